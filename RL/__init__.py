@@ -1 +1,26 @@
 # RL package for SteveRLBot
+# Classes are imported on first attribute access (PEP 562); torch is only loaded
+# once something that needs it (e.g. SteveRLBot()) is actually used.
+import importlib
+
+_EXPORTS = {
+    'SteveRLBot': '.agent',
+    'SimpleGridEnv': '.env',
+    'VectorGridEnv': '.env',
+    'ReplayBuffer': '.replay_buffer',
+    'PrioritizedReplayBuffer': '.replay_buffer',
+    'CheckpointManager': '.checkpoint',
+    'MemoryStore': '.memory_store',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,67 +1,112 @@
 import os
 import random
-import json
 import numpy as np
-import torch
-from RL.dqn import DQN
-from RL.replay_buffer import ReplayBuffer
+from RL.replay_buffer import ReplayBuffer, PrioritizedReplayBuffer
+from RL.memory_store import MemoryStore
+from RL.checkpoint import CheckpointManager
 
-MEMORY_FILE = "steve_memory.json"
+MEMORY_FILE = "steve_memory.jsonl"
+LEGACY_MEMORY_FILE = "steve_memory.json"
 
 class SteveRLBot:
     ACTIONS = ["up", "down", "left", "right"]
     POLICY_PATH = "steve_policy_net.pth"
     TARGET_PATH = "steve_target_net.pth"
+    CHECKPOINT_DIR = "steve_checkpoints"
 
-    def __init__(self, grid_size=12, state_size=4, action_size=4, device=None):
+    def __init__(self, grid_size=12, state_size=4, action_size=4, device=None, prioritized=False,
+                 train_every=1, gradient_steps=1, learning_starts=None, fused_updates=False):
+        # torch is imported here and in the methods that need it, so importing RL.agent stays cheap
+        import torch
+        from RL.dqn import DQN
         self.grid_size = grid_size
         self.state_size = state_size
         self.action_size = action_size
         self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
         self.reset()
-        self.load_memory()
+        self.memory_store = MemoryStore(MEMORY_FILE, legacy_path=LEGACY_MEMORY_FILE)
+        self._known_objects = None  # read from memory_store on first use
         # DQN
         self.policy_net = DQN(state_size, action_size).to(self.device)
         self.target_net = DQN(state_size, action_size).to(self.device)
         self.optimizer = torch.optim.Adam(self.policy_net.parameters(), lr=1e-4)  # Lower learning rate
-        self.memory = ReplayBuffer(5000)  # Larger buffer
+        self.prioritized = prioritized
+        if prioritized:
+            self.memory = PrioritizedReplayBuffer(5000, state_size)
+        else:
+            self.memory = ReplayBuffer(5000, state_size)  # Larger buffer
         self.batch_size = 64  # Larger batch size
         self.gamma = 0.99
         self.epsilon = 1.0
         self.epsilon_min = 0.05
         self.epsilon_decay = 0.999  # Slower decay
         self.update_target_steps = 500  # Update less frequently
+        # Sample/compute ratio: every train_every transitions run gradient_steps updates,
+        # either one after another or as a single fused batch of batch_size * gradient_steps
+        self.train_every = train_every
+        self.gradient_steps = gradient_steps
+        self.learning_starts = self.batch_size if learning_starts is None else learning_starts
+        self.fused_updates = fused_updates
+        self.env_steps = 0
         self.learn_step = 0
-        self._load_dqn()
-        self.target_net.load_state_dict(self.policy_net.state_dict())
+        self.checkpoints = CheckpointManager(self.CHECKPOINT_DIR, keep=3, prefix="steve")
+        if not self._load_dqn():
+            self.target_net.load_state_dict(self.policy_net.state_dict())
         self.target_net.eval()
 
     def _save_dqn(self):
-        torch.save(self.policy_net.state_dict(), self.POLICY_PATH)
-        torch.save(self.target_net.state_dict(), self.TARGET_PATH)
+        # Queued for the background writer; call close() to wait for it
+        self.checkpoints.save({
+            "policy_net": self.policy_net.state_dict(),
+            "target_net": self.target_net.state_dict(),
+            "optimizer": self.optimizer.state_dict(),
+            "epsilon": self.epsilon,
+            "learn_step": self.learn_step,
+        }, self.learn_step)
 
     def _load_dqn(self):
+        """Restore the latest checkpoint; returns False if there was none (legacy weights or a fresh start)."""
+        import torch
+        checkpoint = self.checkpoints.load_latest(map_location=self.device)
+        if checkpoint is not None:
+            self.policy_net.load_state_dict(checkpoint["policy_net"])
+            self.target_net.load_state_dict(checkpoint["target_net"])
+            self.optimizer.load_state_dict(checkpoint["optimizer"])
+            self.epsilon = checkpoint["epsilon"]
+            self.learn_step = checkpoint["learn_step"]
+            return True
+        # Weights-only files from before checkpoints were introduced
         if os.path.exists(self.POLICY_PATH):
             self.policy_net.load_state_dict(torch.load(self.POLICY_PATH, map_location=self.device))
         if os.path.exists(self.TARGET_PATH):
             self.target_net.load_state_dict(torch.load(self.TARGET_PATH, map_location=self.device))
+        return False
+
+    def close(self):
+        # Flush discovered objects, finish pending checkpoint writes and stop the writer thread
+        self.memory_store.close()
+        self.checkpoints.close()
 
     def reset(self):
         self.x = random.randint(0, self.grid_size-1)
         self.y = random.randint(0, self.grid_size-1)
         self.known_objects = set()
         self.steps = 0
+        self.last_reward = 0.0
+        self.last_done = False
 
     def load_memory(self):
-        if os.path.exists(MEMORY_FILE):
-            with open(MEMORY_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                self.known_objects = set()
-                for obs in data.get("recent_observations", []):
-                    if ":" in obs:
-                        _, objs = obs.split(":", 1)
-                        for obj in objs.split(","):
-                            self.known_objects.add(obj.strip())
+        self.known_objects = set(self.memory_store.load())
+
+    @property
+    def known_objects(self):
+        if self._known_objects is None:
+            self.load_memory()
+        return self._known_objects
+
+    @known_objects.setter
+    def known_objects(self, objects):
+        self._known_objects = objects
 
     def perceive(self, env):
         obj = env.get_object(self.x, self.y)
@@ -88,14 +133,7 @@ class SteveRLBot:
         return obj, reward, done
 
     def remember(self, obj, desc):
-        if os.path.exists(MEMORY_FILE):
-            with open(MEMORY_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        else:
-            data = {"conversation_history": [], "recent_observations": []}
-        data["recent_observations"].append(f"Object: {obj} = {desc}")
-        with open(MEMORY_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        self.memory_store.append(obj, desc)
 
     def get_state(self, env):
         # State: [x, y, is_object_here, is_object_known]
@@ -111,11 +149,22 @@ class SteveRLBot:
     def choose_action(self, state):
         if np.random.rand() < self.epsilon:
             return random.randrange(self.action_size)
+        import torch
         state_tensor = torch.FloatTensor(state).unsqueeze(0).to(self.device)
         with torch.no_grad():
             q_values = self.policy_net(state_tensor)
         return q_values.argmax().item()
 
+    def choose_actions(self, states):
+        # Epsilon-greedy over a batch of states (one forward pass)
+        import torch
+        states_tensor = torch.as_tensor(states, dtype=torch.float32, device=self.device)
+        with torch.no_grad():
+            actions = self.policy_net(states_tensor).argmax(1).cpu().numpy()
+        explore = np.random.rand(len(actions)) < self.epsilon
+        actions[explore] = np.random.randint(self.action_size, size=int(explore.sum()))
+        return actions
+
     def step(self, env):
         state = self.get_state(env)
         action_idx = self.choose_action(state)
@@ -132,29 +181,67 @@ class SteveRLBot:
             self.x += 1
         self.steps += 1
         obj, reward, done = self.perceive(env)
+        self.last_reward, self.last_done = reward, done
         next_state = self.get_state(env)
         self.memory.push(state, action_idx, reward, next_state, done)
-        self.learn()
+        self.on_transitions(1)
         # Decay epsilon (per episode is better, but keep per step for now, just slower)
         if self.epsilon > self.epsilon_min:
             self.epsilon *= self.epsilon_decay
         return obj
 
-    def learn(self):
+    def step_batch(self, venv):
+        # Step every env in a VectorGridEnv at once and store all transitions
+        states = venv.observe()
+        actions = self.choose_actions(states)
+        next_states, rewards, dones = venv.step(actions)
+        self.memory.push_batch(states, actions, rewards, next_states, dones)
+        self.on_transitions(len(actions))
+        if self.epsilon > self.epsilon_min:
+            self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay ** len(actions))
+        return rewards, dones
+
+    def on_transitions(self, n):
+        # Run the updates owed for n new transitions once past the warm-up period
+        prev_steps = self.env_steps
+        self.env_steps += n
+        if self.env_steps < self.learning_starts:
+            return
+        rounds = self.env_steps // self.train_every - prev_steps // self.train_every
+        if rounds:
+            self.train(rounds * self.gradient_steps)
+
+    def train(self, gradient_steps):
+        if self.fused_updates:
+            self.learn(self.batch_size * gradient_steps)
+        else:
+            for _ in range(gradient_steps):
+                self.learn()
+
+    def learn(self, batch_size=None):
+        import torch
+        batch_size = batch_size or self.batch_size
         if len(self.memory) < self.batch_size:
             return
-        states, actions, rewards, next_states, dones = self.memory.sample(self.batch_size)
-        states = torch.FloatTensor(states).to(self.device)
-        actions = torch.LongTensor(actions).unsqueeze(1).to(self.device)
-        rewards = torch.FloatTensor(rewards).unsqueeze(1).to(self.device)
-        next_states = torch.FloatTensor(next_states).to(self.device)
-        dones = torch.FloatTensor(dones).unsqueeze(1).to(self.device)
+        if self.prioritized:
+            states, actions, rewards, next_states, dones, indices, weights = \
+                self.memory.sample_tensors(batch_size, self.device)
+        else:
+            states, actions, rewards, next_states, dones = self.memory.sample_tensors(batch_size, self.device)
+        actions = actions.unsqueeze(1)
+        rewards = rewards.unsqueeze(1)
+        dones = dones.unsqueeze(1)
 
         q_values = self.policy_net(states).gather(1, actions)
         with torch.no_grad():
             next_q_values = self.target_net(next_states).max(1)[0].unsqueeze(1)
             target = rewards + self.gamma * next_q_values * (1 - dones)
-        loss = torch.nn.functional.mse_loss(q_values, target)
+        if self.prioritized:
+            td_errors = target - q_values
+            loss = (weights.unsqueeze(1) * td_errors.pow(2)).mean()
+            self.memory.update_priorities(indices, td_errors.detach().abs().squeeze(1).cpu().numpy())
+        else:
+            loss = torch.nn.functional.mse_loss(q_values, target)
         self.optimizer.zero_grad()
         loss.backward()
         self.optimizer.step()
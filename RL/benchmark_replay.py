@@ -0,0 +1,68 @@
+"""
+Compare uniform and prioritized replay on VectorGridEnv.
+Reports how many environment steps each needs before the moving-average
+episode reward reaches --target. Weights are neither loaded nor saved.
+
+    python -m RL.benchmark_replay --target -3.0 --max-steps 300000 --seeds 3
+"""
+import argparse
+import random
+import numpy as np
+import torch
+from RL.env import VectorGridEnv
+from RL.agent import SteveRLBot
+
+class _BenchBot(SteveRLBot):
+    # Start from fresh networks and keep the benchmark off the real checkpoints
+    def _load_dqn(self):
+        pass
+
+    def _save_dqn(self):
+        pass
+
+def steps_to_target(prioritized, seed, args):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+    steve = _BenchBot(args.grid_size, prioritized=prioritized)
+    venv = VectorGridEnv(args.num_envs, args.grid_size, max_steps=args.steps_per_episode, seed=seed)
+    running = np.zeros(args.num_envs)
+    finished = []
+    env_steps = 0
+    try:
+        while env_steps < args.max_steps:
+            truncating = venv.steps + 1 >= venv.max_steps
+            rewards, dones = steve.step_batch(venv)
+            env_steps += len(rewards)
+            running += rewards
+            ended = dones | truncating
+            finished.extend(running[ended])
+            running[ended] = 0.0
+            if len(finished) >= args.window and np.mean(finished[-args.window:]) >= args.target:
+                return env_steps, np.mean(finished[-args.window:])
+        return None, np.mean(finished[-args.window:])
+    finally:
+        steve.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Environment steps to reach a reward with uniform vs prioritized replay.")
+    parser.add_argument("--target", type=float, default=-3.0, help="Moving-average episode reward to reach")
+    parser.add_argument("--window", type=int, default=100, help="Episodes in the moving average")
+    parser.add_argument("--max-steps", type=int, default=300000)
+    parser.add_argument("--num-envs", type=int, default=16)
+    parser.add_argument("--steps-per-episode", type=int, default=100)
+    parser.add_argument("--grid-size", type=int, default=12)
+    parser.add_argument("--seeds", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    for name, prioritized in (("uniform", False), ("prioritized", True)):
+        runs = [steps_to_target(prioritized, seed, args) for seed in range(args.seeds)]
+        results = [steps for steps, _ in runs]
+        reached = [r for r in results if r is not None]
+        summary = f"mean {np.mean(reached):.0f} steps" if reached else "never reached"
+        final = np.mean([avg for _, avg in runs])
+        print(f"{name:>12}: {results} -> {summary} ({len(reached)}/{len(results)} runs reached {args.target}, "
+              f"final avg reward {final:.2f})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import atexit
+import glob
+import os
+import queue
+import threading
+
+def _to_cpu(obj):
+    # Copy every tensor to CPU so training can keep mutating the originals
+    import torch
+    if torch.is_tensor(obj):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {k: _to_cpu(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_to_cpu(v) for v in obj)
+    return obj
+
+class CheckpointManager:
+    """Writes checkpoints on a background thread and keeps the newest `keep`.
+
+    save() snapshots the state to CPU and returns immediately. Each file is
+    written to a temp name and moved into place with os.replace, so a killed
+    process never leaves a half-written checkpoint behind. The writer thread
+    starts on the first save(); close() stops it.
+    """
+    def __init__(self, directory, keep=3, prefix="ckpt"):
+        self.directory = directory
+        self.keep = keep
+        self.prefix = prefix
+        self.error = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def path_for(self, step):
+        return os.path.join(self.directory, f"{self.prefix}_{step:09d}.pt")
+
+    def save(self, state, step):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name="checkpoint-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.wait)
+        self._queue.put((_to_cpu(state), step))
+
+    def wait(self):
+        """Block until every queued checkpoint is on disk."""
+        self._queue.join()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def close(self):
+        """Write what is queued, then stop the writer thread and drop its exit hook."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            atexit.unregister(self.wait)
+            self._queue.put(None)
+            thread.join()
+        self.wait()
+
+    def checkpoints(self):
+        return sorted(glob.glob(os.path.join(self.directory, f"{self.prefix}_*.pt")))
+
+    def load_latest(self, map_location=None):
+        paths = self.checkpoints()
+        if not paths:
+            return None
+        import torch
+        return torch.load(paths[-1], map_location=map_location)
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            state, step = item
+            try:
+                self._write(state, step)
+            except Exception as e:
+                print(f"[!] Failed to write checkpoint for step {step}: {e}")
+                self.error = e
+            finally:
+                self._queue.task_done()
+
+    def _write(self, state, step):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(step)
+        tmp_path = path + ".tmp"
+        import torch
+        torch.save(state, tmp_path)
+        os.replace(tmp_path, path)
+        for old in self.checkpoints()[:-self.keep]:
+            os.remove(old)
@@ -1,17 +1,24 @@
 import random
+import numpy as np
+
+# Expanded object list
+OBJECT_LIST = [
+    "apple", "ball", "tree", "dog", "cat", "car", "book", "chair", "bottle", "phone",
+    "laptop", "cup", "shoe", "hat", "pen", "pencil", "bag", "mouse", "keyboard", "lamp",
+    "banana", "orange", "table", "door", "window", "plant", "clock", "fan", "tv", "remote",
+    "candle", "box", "bowl", "spoon", "fork", "plate", "key", "wallet", "coin", "ring"
+]
+
+# Same order as SteveRLBot.ACTIONS: up, down, left, right
+ACTION_DX = np.array([0, 0, -1, 1], dtype=np.int64)
+ACTION_DY = np.array([-1, 1, 0, 0], dtype=np.int64)
 
 class SimpleGridEnv:
     def __init__(self, grid_size=12, num_obstacles=None):
         self.grid_size = grid_size
         self.objects = {}
         self.obstacles = set()
-        # Expanded object list
-        object_list = [
-            "apple", "ball", "tree", "dog", "cat", "car", "book", "chair", "bottle", "phone",
-            "laptop", "cup", "shoe", "hat", "pen", "pencil", "bag", "mouse", "keyboard", "lamp",
-            "banana", "orange", "table", "door", "window", "plant", "clock", "fan", "tv", "remote",
-            "candle", "box", "bowl", "spoon", "fork", "plate", "key", "wallet", "coin", "ring"
-        ]
+        object_list = OBJECT_LIST
         # Place more objects (about 2 per row)
         num_objects = grid_size * 2
         placed = 0
@@ -48,3 +55,103 @@ class SimpleGridEnv:
 
     def is_goal(self, x, y):
         return (x, y) in self.goals
+
+
+class VectorGridEnv:
+    """N SimpleGridEnv-style worlds held as NumPy arrays and stepped together.
+
+    Grids are indexed [env, y, x]. object_ids holds an index into OBJECT_LIST
+    or -1 for an empty cell. Rewards and states match SteveRLBot.perceive and
+    SteveRLBot.get_state; envs that finish (or hit max_steps) are reset in place.
+    """
+    def __init__(self, num_envs=64, grid_size=12, num_obstacles=None, max_steps=100, seed=None):
+        self.num_envs = num_envs
+        self.grid_size = grid_size
+        self.num_objects = grid_size * 2
+        if num_obstacles is None:
+            num_obstacles = max(1, (grid_size * grid_size) // 10)
+        self.num_obstacles = num_obstacles
+        self.num_goals = 2
+        self.max_steps = max_steps
+        self.rng = np.random.default_rng(seed)
+        shape = (num_envs, grid_size, grid_size)
+        self.obstacles = np.zeros(shape, dtype=bool)
+        self.goals = np.zeros(shape, dtype=bool)
+        self.object_ids = np.full(shape, -1, dtype=np.int16)
+        self.known = np.zeros((num_envs, len(OBJECT_LIST)), dtype=bool)
+        self.x = np.zeros(num_envs, dtype=np.int64)
+        self.y = np.zeros(num_envs, dtype=np.int64)
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        self._env_index = np.arange(num_envs)
+        self.reset()
+
+    def reset(self, mask=None):
+        """Regenerate the worlds selected by mask (all of them by default)."""
+        idx = self._env_index if mask is None else np.flatnonzero(mask)
+        n = len(idx)
+        if n == 0:
+            return self.observe()
+        g = self.grid_size
+        # One random permutation of cells per env: objects first, then obstacles, then goals
+        cells = self.rng.random((n, g * g)).argsort(axis=1)
+        n_obj, n_obs = self.num_objects, self.num_obstacles
+        rows = np.repeat(np.arange(n), n_obj)
+        obj_cells = cells[:, :n_obj].ravel()
+        obs_cells = cells[:, n_obj:n_obj + n_obs]
+        goal_cells = cells[:, n_obj + n_obs:n_obj + n_obs + self.num_goals]
+
+        object_ids = np.full((n, g * g), -1, dtype=np.int16)
+        object_ids[rows, obj_cells] = self.rng.integers(0, len(OBJECT_LIST), size=n * n_obj)
+        obstacles = np.zeros((n, g * g), dtype=bool)
+        np.put_along_axis(obstacles, obs_cells, True, axis=1)
+        goals = np.zeros((n, g * g), dtype=bool)
+        np.put_along_axis(goals, goal_cells, True, axis=1)
+
+        self.object_ids[idx] = object_ids.reshape(n, g, g)
+        self.obstacles[idx] = obstacles.reshape(n, g, g)
+        self.goals[idx] = goals.reshape(n, g, g)
+        self.known[idx] = False
+        self.x[idx] = self.rng.integers(0, g, size=n)
+        self.y[idx] = self.rng.integers(0, g, size=n)
+        self.steps[idx] = 0
+        return self.observe()
+
+    def observe(self):
+        """Batched state: [x, y, is_object_here, is_object_known] per env."""
+        obj = self.object_ids[self._env_index, self.y, self.x]
+        here = obj >= 0
+        known = here & self.known[self._env_index, np.maximum(obj, 0)]
+        scale = self.grid_size - 1
+        return np.stack([self.x / scale, self.y / scale, here, known], axis=1).astype(np.float32)
+
+    def step(self, actions):
+        """Move every agent and return (next_states, rewards, dones).
+
+        next_states are the states reached by this step, before finished envs
+        are reset; call observe() for the states to act on next.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        g = self.grid_size
+        self.x = np.clip(self.x + ACTION_DX[actions], 0, g - 1)
+        self.y = np.clip(self.y + ACTION_DY[actions], 0, g - 1)
+        self.steps += 1
+
+        envs = self._env_index
+        at_goal = self.goals[envs, self.y, self.x]
+        at_obstacle = self.obstacles[envs, self.y, self.x] & ~at_goal
+        obj = self.object_ids[envs, self.y, self.x]
+        has_obj = (obj >= 0) & ~at_goal & ~at_obstacle
+        obj_idx = np.maximum(obj, 0)
+        is_new = has_obj & ~self.known[envs, obj_idx]
+        self.known[envs[is_new], obj_idx[is_new]] = True
+
+        rewards = np.full(self.num_envs, -0.1, dtype=np.float32)
+        rewards[has_obj] = -1.0
+        rewards[is_new] = 2.0
+        rewards[at_obstacle] = -5.0
+        rewards[at_goal] = 10.0
+        dones = at_goal | at_obstacle
+
+        next_states = self.observe()
+        self.reset(dones | (self.steps >= self.max_steps))
+        return next_states, rewards, dones
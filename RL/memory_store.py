@@ -0,0 +1,82 @@
+import atexit
+import json
+import os
+import time
+
+class MemoryStore:
+    """Append-only JSONL store for objects Steve has discovered.
+
+    Each line is {"object": ..., "desc": ..., "time": ...}. New entries are
+    buffered and appended in batches (every flush_every entries or
+    flush_interval seconds, and at exit), so the cost of remember() does not
+    grow with the history. Re-recording an object with the same description is
+    a no-op. objects is the in-memory index: object -> latest desc.
+    """
+    def __init__(self, path, flush_every=64, flush_interval=5.0, legacy_path=None):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.objects = {}
+        self._pending = []
+        self._offset = 0
+        self._last_flush = time.monotonic()
+        if legacy_path and os.path.exists(legacy_path) and not os.path.exists(path):
+            self._import_legacy(legacy_path)
+        atexit.register(self.flush)
+
+    def _import_legacy(self, legacy_path):
+        # One-time conversion of the old steve_memory.json format
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for obs in data.get("recent_observations", []):
+            if ":" in obs:
+                _, entry = obs.split(":", 1)
+                obj, _, desc = entry.partition("=")
+                obj, desc = obj.strip(), desc.strip()
+                self.objects[obj] = desc
+                self._pending.append({"object": obj, "desc": desc, "time": None})
+        self.flush()
+
+    def load(self):
+        """Read entries appended since the last load (by this or another process)."""
+        if not os.path.exists(self.path):
+            return self.objects
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Partially written line; pick it up next time
+                self._offset += len(line)
+                if line.strip():
+                    entry = json.loads(line)
+                    self.objects[entry["object"]] = entry.get("desc", "")
+        return self.objects
+
+    def append(self, obj, desc=""):
+        if self.objects.get(obj, None) == desc:
+            return  # Already recorded; keeps the file from growing on every rediscovery
+        self.objects[obj] = desc
+        self._pending.append({"object": obj, "desc": desc, "time": time.time()})
+        if len(self._pending) >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        data = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in self._pending).encode("utf-8")
+        self._pending = []
+        size_before = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        with open(self.path, "ab") as f:
+            f.write(data)
+        if size_before == self._offset:
+            # Nothing else was appended since our last read, so our own lines need no re-read
+            self._offset += len(data)
+
+    def close(self):
+        """Flush, and drop the exit hook so a closed store can be garbage collected."""
+        self.flush()
+        atexit.unregister(self.flush)
+
+    def __len__(self):
+        return len(self.objects)
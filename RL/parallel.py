@@ -0,0 +1,156 @@
+"""
+Parallel actors / single learner training for SteveRLBot.
+Each actor process steps its own grid envs with a CPU copy of the DQN that is
+re-synced from shared memory, and ships transitions to the learner through a
+queue. The learner (a regular SteveRLBot) fills its replay buffer and runs
+gradient updates on the same train_every / gradient_steps schedule as RL.train.
+
+    python -m RL.parallel --actors 8 --transitions 1000000
+    python -m RL.parallel --actors 8 --train-every 32 --gradient-steps 4 --fused
+"""
+import argparse
+import os
+import queue
+import time
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+from RL.env import VectorGridEnv
+from RL.dqn import DQN
+from RL.agent import SteveRLBot
+from RL.train import add_schedule_args, make_bot
+
+def actor_loop(actor_id, shared_net, weights_lock, epsilon, transitions, stop_event, args):
+    torch.set_num_threads(1)
+    rng = np.random.default_rng(args.seed + actor_id)
+    torch.manual_seed(args.seed + actor_id)
+    net = DQN(shared_net.fc1.in_features, shared_net.fc3.out_features)
+    with weights_lock:
+        net.load_state_dict(shared_net.state_dict())
+    venv = VectorGridEnv(args.envs_per_actor, args.grid_size, max_steps=args.steps_per_episode,
+                         seed=args.seed + actor_id)
+    running = np.zeros(args.envs_per_actor)
+    chunk, finished = [], []
+    steps = 0
+    states = venv.observe()
+    while not stop_event.is_set():
+        with torch.no_grad():
+            actions = net(torch.from_numpy(states)).argmax(1).numpy()
+        explore = rng.random(len(actions)) < epsilon.value
+        actions[explore] = rng.integers(0, len(SteveRLBot.ACTIONS), size=int(explore.sum()))
+        truncating = venv.steps + 1 >= venv.max_steps
+        next_states, rewards, dones = venv.step(actions)
+        chunk.append((states, actions, rewards, next_states, dones))
+        running += rewards
+        ended = dones | truncating
+        finished.extend(running[ended].tolist())
+        running[ended] = 0.0
+        states = venv.observe()
+        steps += 1
+        if len(chunk) >= args.send_every:
+            batch = tuple(np.concatenate(parts) for parts in zip(*chunk))
+            _put(transitions, (batch, finished), stop_event)
+            chunk, finished = [], []
+        if steps % args.sync_every == 0:
+            with weights_lock:
+                net.load_state_dict(shared_net.state_dict())
+    # Let the process exit even if the learner never drains what is left in the queue
+    transitions.cancel_join_thread()
+
+def _put(transitions, item, stop_event):
+    # Bounded queue: block for backpressure, but keep checking for shutdown
+    while not stop_event.is_set():
+        try:
+            transitions.put(item, timeout=0.5)
+            return
+        except queue.Full:
+            pass
+
+def train_parallel(args):
+    # Default: one training round per step of every actor's envs, as RL.train does per vector step
+    steve = make_bot(args, train_every=args.actors * args.envs_per_actor)
+    ctx = mp.get_context("spawn")
+    shared_net = DQN(steve.state_size, steve.action_size)
+    shared_net.load_state_dict(steve.policy_net.state_dict())
+    shared_net.share_memory()
+    weights_lock = ctx.Lock()
+    epsilon = ctx.Value("d", steve.epsilon, lock=False)
+    transitions = ctx.Queue(maxsize=args.queue_size)
+    stop_event = ctx.Event()
+    actors = [ctx.Process(target=actor_loop, name=f"actor-{i}", daemon=True,
+                          args=(i, shared_net, weights_lock, epsilon, transitions, stop_event, args))
+              for i in range(args.actors)]
+    for actor in actors:
+        actor.start()
+
+    received = updates = 0
+    first_step = published = steve.learn_step
+    episode_rewards = []
+    start = last_log = time.perf_counter()
+    last_received = last_updates = 0
+    try:
+        while received < args.transitions:
+            try:
+                batch, finished = transitions.get(timeout=args.log_interval)
+            except queue.Empty:
+                batch = None
+            if batch is not None:
+                steve.memory.push_batch(*batch)
+                episode_rewards.extend(finished)
+                n = len(batch[0])
+                received += n
+                # Runs whatever updates the schedule owes for these n transitions
+                steve.on_transitions(n)
+                updates = steve.learn_step - first_step
+                if steve.epsilon > steve.epsilon_min:
+                    steve.epsilon = max(steve.epsilon_min, steve.epsilon * steve.epsilon_decay ** n)
+                epsilon.value = steve.epsilon
+                if steve.learn_step - published >= args.sync_every_updates:
+                    published = steve.learn_step
+                    with weights_lock:
+                        shared_net.load_state_dict(steve.policy_net.state_dict())
+            now = time.perf_counter()
+            if now - last_log >= args.log_interval:
+                recent = episode_rewards[-100:]
+                avg = sum(recent) / len(recent) if recent else float("nan")
+                print(f"[{now - start:.0f}s] {(received - last_received) / (now - last_log):.0f} transitions/s | "
+                      f"{(updates - last_updates) / (now - last_log):.0f} updates/s | "
+                      f"avg reward {avg:.2f} | epsilon {steve.epsilon:.3f}")
+                last_log, last_received, last_updates = now, received, updates
+    except KeyboardInterrupt:
+        print("\n[INFO] Training interrupted.")
+    finally:
+        stop_event.set()
+        for actor in actors:
+            actor.join(timeout=5)
+            if actor.is_alive():
+                actor.terminate()
+        steve._save_dqn()
+        steve.close()
+        elapsed = time.perf_counter() - start
+        print(f"[INFO] {received} transitions ({received / elapsed:.0f}/s), "
+              f"{updates} updates ({updates / elapsed:.0f}/s). DQN weights saved.")
+    return episode_rewards
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train SteveRLBot with parallel actor processes and one learner.")
+    parser.add_argument("--actors", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument("--envs-per-actor", type=int, default=8)
+    parser.add_argument("--transitions", type=int, default=1_000_000, help="Stop after this many transitions")
+    parser.add_argument("--steps-per-episode", type=int, default=100)
+    parser.add_argument("--grid-size", type=int, default=12)
+    parser.add_argument("--prioritized", action="store_true", help="Use prioritized experience replay")
+    add_schedule_args(parser, "--actors * --envs-per-actor")
+    parser.add_argument("--send-every", type=int, default=16, help="Actor steps per message to the learner")
+    parser.add_argument("--sync-every", type=int, default=200, help="Actor steps between weight syncs")
+    parser.add_argument("--sync-every-updates", type=int, default=100, help="Learner updates between weight publishes")
+    parser.add_argument("--queue-size", type=int, default=64)
+    parser.add_argument("--log-interval", type=float, default=5.0, help="Seconds between throughput reports")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    train_parallel(parse_args(argv))
+
+if __name__ == "__main__":
+    main()
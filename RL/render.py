@@ -0,0 +1,51 @@
+import pygame
+
+class GridRenderer:
+    """Draws a SimpleGridEnv with pygame, caching the font and the static board.
+
+    Obstacles, goals and object labels only change when the env changes, so they
+    are drawn once onto a background surface and blitted each frame.
+    """
+    def __init__(self, grid_size=12, size=600, caption="Steve RL Bot Grid World"):
+        pygame.init()
+        self.grid_size = grid_size
+        self.cell = size // grid_size
+        self.screen = pygame.display.set_mode((size, size))
+        pygame.display.set_caption(caption)
+        self.font = pygame.font.SysFont(None, 18)
+        self.background = None
+        self._env = None
+
+    def _build_background(self, env):
+        cell = self.cell
+        background = pygame.Surface(self.screen.get_size())
+        background.fill((255,255,255))
+        # Draw obstacles
+        for (x, y) in env.obstacles:
+            pygame.draw.rect(background, (0,0,0), (x*cell, y*cell, cell, cell))
+        # Draw goals
+        for (x, y) in env.goals:
+            pygame.draw.rect(background, (0,255,0), (x*cell, y*cell, cell, cell))
+        # Draw objects
+        for (x, y), obj in env.objects.items():
+            pygame.draw.rect(background, (200,200,200), (x*cell, y*cell, cell, cell))
+            img = self.font.render(obj, True, (0,0,0))
+            background.blit(img, (x*cell+2, y*cell+2))
+        return background.convert()
+
+    def draw(self, env, steve):
+        if env is not self._env:
+            self.background = self._build_background(env)
+            self._env = env
+        cell = self.cell
+        self.screen.blit(self.background, (0, 0))
+        # Draw Steve
+        pygame.draw.circle(self.screen, (0,0,255), (steve.x*cell+cell//2, steve.y*cell+cell//2), cell//3)
+        pygame.display.flip()
+
+    def poll_quit(self):
+        # Drain the event queue; True if the window was closed
+        return any(event.type == pygame.QUIT for event in pygame.event.get())
+
+    def close(self):
+        pygame.quit()
@@ -1,17 +1,162 @@
 import numpy as np
-from collections import deque
 
 class ReplayBuffer:
-    def __init__(self, capacity=10000):
-        self.buffer = deque(maxlen=capacity)
+    """Ring buffer backed by preallocated contiguous arrays.
+
+    Arrays are allocated on the first push (or up front if state_size is given)
+    and overwritten in place once the buffer is full.
+    """
+    def __init__(self, capacity=10000, state_size=None):
+        self.capacity = capacity
+        self.pos = 0
+        self.size = 0
+        self.states = None
+        if state_size is not None:
+            self._allocate((state_size,))
+
+    def _allocate(self, state_shape):
+        self.states = np.zeros((self.capacity, *state_shape), dtype=np.float32)
+        self.next_states = np.zeros((self.capacity, *state_shape), dtype=np.float32)
+        self.actions = np.zeros(self.capacity, dtype=np.int64)
+        self.rewards = np.zeros(self.capacity, dtype=np.float32)
+        self.dones = np.zeros(self.capacity, dtype=np.float32)
 
     def push(self, state, action, reward, next_state, done):
-        self.buffer.append((state, action, reward, next_state, done))
+        if self.states is None:
+            self._allocate(np.shape(state))
+        i = self.pos
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.pos = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def push_batch(self, states, actions, rewards, next_states, dones):
+        states = np.asarray(states, dtype=np.float32)
+        if self.states is None:
+            self._allocate(states.shape[1:])
+        n = len(states)
+        if n > self.capacity:
+            # Only the newest capacity transitions would survive anyway
+            states, actions, rewards, next_states, dones = (
+                np.asarray(a)[-self.capacity:] for a in (states, actions, rewards, next_states, dones))
+            n = self.capacity
+        idx = (self.pos + np.arange(n)) % self.capacity
+        self.states[idx] = states
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.next_states[idx] = next_states
+        self.dones[idx] = dones
+        self.pos = (self.pos + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+
+    def sample_indices(self, batch_size):
+        # Uniform with replacement: O(batch_size) instead of a permutation of the buffer
+        return np.random.randint(0, self.size, size=batch_size)
 
     def sample(self, batch_size):
-        indices = np.random.choice(len(self.buffer), batch_size, replace=False)
-        states, actions, rewards, next_states, dones = zip(*[self.buffer[idx] for idx in indices])
-        return np.array(states), actions, rewards, np.array(next_states), dones
+        idx = self.sample_indices(batch_size)
+        return self.states[idx], self.actions[idx], self.rewards[idx], self.next_states[idx], self.dones[idx]
+
+    def sample_tensors(self, batch_size, device="cpu"):
+        # Fancy indexing already yields fresh contiguous arrays, so from_numpy does not copy
+        import torch
+        return tuple(torch.from_numpy(a).to(device) for a in self.sample(batch_size))
 
     def __len__(self):
-        return len(self.buffer)
+        return self.size
+
+
+class SumTree:
+    """Binary tree of priority sums stored in a flat array (root at index 1).
+
+    Leaves live at [leaf_count, 2 * leaf_count). Both update and find work on
+    whole batches of indices, walking one tree level per step: O(log n).
+    """
+    def __init__(self, capacity):
+        self.leaf_count = 1
+        while self.leaf_count < capacity:
+            self.leaf_count *= 2
+        self.depth = self.leaf_count.bit_length() - 1
+        self.tree = np.zeros(2 * self.leaf_count, dtype=np.float64)
+
+    def total(self):
+        return self.tree[1]
+
+    def update(self, indices, priorities):
+        nodes = np.asarray(indices, dtype=np.int64) + self.leaf_count
+        self.tree[nodes] = priorities
+        for _ in range(self.depth):
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def get(self, indices):
+        return self.tree[np.asarray(indices, dtype=np.int64) + self.leaf_count]
+
+    def find(self, values):
+        # Leaf index whose cumulative priority range contains each value
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            go_right = values > self.tree[left]
+            values -= self.tree[left] * go_right
+            nodes = left + go_right
+        return nodes - self.leaf_count
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """Proportional prioritized replay (Schaul et al., 2016).
+
+    Transitions are sampled with probability p_i^alpha / sum(p^alpha) and come
+    back with importance-sampling weights; beta is annealed towards 1. New
+    transitions get the highest priority seen so far so they are replayed at
+    least once.
+    """
+    def __init__(self, capacity=10000, state_size=None, alpha=0.6, beta=0.4, beta_increment=1e-4, eps=1e-3):
+        super().__init__(capacity, state_size)
+        self.tree = SumTree(capacity)
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = beta_increment
+        self.eps = eps
+        self.max_priority = 1.0
+
+    def push(self, state, action, reward, next_state, done):
+        i = self.pos
+        super().push(state, action, reward, next_state, done)
+        self.tree.update([i], self.max_priority)
+
+    def push_batch(self, states, actions, rewards, next_states, dones):
+        n = min(len(states), self.capacity)
+        idx = (self.pos + np.arange(n)) % self.capacity
+        super().push_batch(states, actions, rewards, next_states, dones)
+        self.tree.update(idx, self.max_priority)
+
+    def sample_indices(self, batch_size):
+        # Stratified: one draw from each of batch_size equal slices of the total
+        segment = self.tree.total() / batch_size
+        values = (np.arange(batch_size) + np.random.rand(batch_size)) * segment
+        # Guard against float round-off landing on an empty leaf
+        return np.minimum(self.tree.find(values), self.size - 1)
+
+    def sample(self, batch_size):
+        idx = self.sample_indices(batch_size)
+        probs = self.tree.get(idx) / self.tree.total()
+        weights = (self.size * probs) ** -self.beta
+        weights = (weights / weights.max()).astype(np.float32)
+        self.beta = min(1.0, self.beta + self.beta_increment)
+        return (self.states[idx], self.actions[idx], self.rewards[idx], self.next_states[idx], self.dones[idx],
+                idx, weights)
+
+    def sample_tensors(self, batch_size, device="cpu"):
+        import torch
+        *batch, idx, weights = self.sample(batch_size)
+        return (*(torch.from_numpy(a).to(device) for a in batch), idx, torch.from_numpy(weights).to(device))
+
+    def update_priorities(self, indices, td_errors):
+        priorities = (np.abs(td_errors) + self.eps) ** self.alpha
+        self.tree.update(indices, priorities)
+        self.max_priority = max(self.max_priority, float(priorities.max()))
@@ -0,0 +1,149 @@
+"""
+Headless trainer for SteveRLBot.
+Runs episodes as fast as the network allows; pygame is only loaded when an
+episode is rendered.
+
+    python -m RL.train --episodes 1000 --no-render
+    python -m RL.train --episodes 1000 --render-every 100
+    python -m RL.train --episodes 1000 --num-envs 64 --no-render
+    python -m RL.train --episodes 1000 --train-every 4 --gradient-steps 2 --fused --no-render
+"""
+import argparse
+import time
+from RL.env import SimpleGridEnv, VectorGridEnv
+from RL.agent import SteveRLBot
+
+def add_schedule_args(parser, train_every_default):
+    """The SteveRLBot update-schedule flags, shared with RL.parallel."""
+    parser.add_argument("--train-every", type=int, default=None,
+                        help=f"Transitions between training rounds (default: {train_every_default})")
+    parser.add_argument("--gradient-steps", type=int, default=1, help="Gradient updates per training round")
+    parser.add_argument("--learning-starts", type=int, default=None, help="Transitions collected before training")
+    parser.add_argument("--fused", action="store_true", help="Run a round's gradient steps as one larger batch")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train SteveRLBot without the pygame frame cap.")
+    parser.add_argument("--episodes", type=int, default=100)
+    parser.add_argument("--steps-per-episode", type=int, default=100)
+    parser.add_argument("--grid-size", type=int, default=12)
+    parser.add_argument("--num-envs", type=int, default=1, help="Step this many envs at once with VectorGridEnv")
+    parser.add_argument("--prioritized", action="store_true", help="Use prioritized experience replay")
+    add_schedule_args(parser, "1, or --num-envs when vectorized")
+    parser.add_argument("--no-render", action="store_true", help="Never open the pygame window")
+    parser.add_argument("--render-every", type=int, default=0, help="Render every K-th episode (0 = never)")
+    parser.add_argument("--fps", type=int, default=0, help="Frame cap while rendering (0 = unthrottled)")
+    parser.add_argument("--save-every", type=int, default=50, help="Save weights every N episodes")
+    parser.add_argument("--log-every", type=int, default=10)
+    parser.add_argument("--plot", action="store_true", help="Show the matplotlib reward curve")
+    return parser.parse_args(argv)
+
+def make_bot(args, train_every=None):
+    train_every = args.train_every or train_every or max(1, args.num_envs)
+    return SteveRLBot(args.grid_size, prioritized=args.prioritized, train_every=train_every,
+                      gradient_steps=args.gradient_steps, learning_starts=args.learning_starts,
+                      fused_updates=args.fused)
+
+def run_episode(steve, env, steps_per_episode, renderer=None, clock=None, fps=0):
+    steve.reset()
+    total_reward = 0.0
+    for _ in range(steps_per_episode):
+        if renderer is not None:
+            if renderer.poll_quit():
+                raise KeyboardInterrupt
+            renderer.draw(env, steve)
+            if fps:
+                clock.tick(fps)
+        steve.step(env)
+        total_reward += steve.last_reward
+        if steve.last_done:
+            break
+    return total_reward
+
+def train(args):
+    steve = make_bot(args)
+    render_every = 0 if args.no_render else args.render_every
+    renderer = clock = visualizer = None
+    if args.plot:
+        from RL.visualization import RLVisualizer
+        visualizer = RLVisualizer()
+
+    episode_rewards = []
+    transitions = 0
+    start = time.perf_counter()
+    try:
+        for episode in range(args.episodes):
+            render = render_every and episode % render_every == 0
+            if render and renderer is None:
+                import pygame
+                from RL.render import GridRenderer
+                renderer = GridRenderer(args.grid_size)
+                clock = pygame.time.Clock()
+            env = SimpleGridEnv(args.grid_size)
+            total_reward = run_episode(steve, env, args.steps_per_episode,
+                                       renderer if render else None, clock, args.fps)
+            transitions += steve.steps
+            episode_rewards.append(total_reward)
+            if visualizer is not None:
+                visualizer.update(episode_rewards)
+            if args.save_every and (episode + 1) % args.save_every == 0:
+                steve._save_dqn()
+            if args.log_every and (episode + 1) % args.log_every == 0:
+                log_progress(episode + 1, episode_rewards, transitions, start, steve)
+    except KeyboardInterrupt:
+        print("\n[INFO] Training interrupted.")
+    finally:
+        steve._save_dqn()
+        steve.close()
+        print("[INFO] DQN weights saved.")
+        if renderer is not None:
+            renderer.close()
+        if visualizer is not None:
+            visualizer.close()
+    return episode_rewards
+
+def train_vectorized(args):
+    steve = make_bot(args)
+    venv = VectorGridEnv(args.num_envs, args.grid_size, max_steps=args.steps_per_episode)
+    running_reward = [0.0] * args.num_envs
+    episode_rewards = []
+    transitions = 0
+    start = time.perf_counter()
+    try:
+        while len(episode_rewards) < args.episodes:
+            # Envs that will be reset after this step (terminal or out of steps)
+            truncating = venv.steps + 1 >= venv.max_steps
+            rewards, dones = steve.step_batch(venv)
+            transitions += len(rewards)
+            for i in range(args.num_envs):
+                running_reward[i] += float(rewards[i])
+                if dones[i] or truncating[i]:
+                    episode_rewards.append(running_reward[i])
+                    running_reward[i] = 0.0
+                    finished = len(episode_rewards)
+                    if args.save_every and finished % args.save_every == 0:
+                        steve._save_dqn()
+                    if args.log_every and finished % args.log_every == 0:
+                        log_progress(finished, episode_rewards, transitions, start, steve)
+    except KeyboardInterrupt:
+        print("\n[INFO] Training interrupted.")
+    finally:
+        steve._save_dqn()
+        steve.close()
+        print("[INFO] DQN weights saved.")
+    return episode_rewards
+
+def log_progress(episodes, episode_rewards, transitions, start, steve):
+    recent = episode_rewards[-10:]
+    elapsed = time.perf_counter() - start
+    print(f"[ep {episodes}] avg reward (last {len(recent)}): {sum(recent) / len(recent):.2f} "
+          f"| epsilon {steve.epsilon:.3f} | {transitions / elapsed:.0f} transitions/s")
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.num_envs > 1:
+        train_vectorized(args)
+    else:
+        train(args)
+
+if __name__ == "__main__":
+    main()
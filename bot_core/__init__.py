@@ -1,17 +1,28 @@
 # Cognitive architecture for AGI bot core
 # This file initializes the cognitive modules for memory, reasoning, and goal management.
+# Modules are imported on first attribute access (PEP 562), so `import bot_core` and
+# scripts like `python -m bot_core.search_knowledge` don't pay for modules they never use.
+import importlib
 
-from .memory import ShortTermMemory, LongTermMemory, EpisodicMemory
-from .reasoning import Reasoner, Planner
-from .goals import GoalManager
-from .learning import ContinuousLearner
+_EXPORTS = {
+    'ShortTermMemory': '.memory',
+    'LongTermMemory': '.memory',
+    'EpisodicMemory': '.memory',
+    'Reasoner': '.reasoning',
+    'AsyncReasoner': '.reasoning',
+    'Planner': '.reasoning',
+    'GoalManager': '.goals',
+    'ContinuousLearner': '.learning',
+}
 
-__all__ = [
-    'ShortTermMemory',
-    'LongTermMemory',
-    'EpisodicMemory',
-    'Reasoner',
-    'Planner',
-    'GoalManager',
-    'ContinuousLearner',
-]
\ No newline at end of file
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
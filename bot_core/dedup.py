@@ -0,0 +1,158 @@
+"""
+Near-duplicate detection for the knowledge base, run before embedding.
+- Each document gets a MinHash signature over its word 5-shingles
+- LSH banding finds candidate pairs; pairs whose estimated Jaccard similarity
+  reaches the threshold are clustered (union-find)
+- Each cluster keeps one canonical document (the longest, then by name); the
+  rest are recorded as aliases in doc_aliases.json so search results can list them
+- Signatures are cached per file (dedup_manifest.json) and only recomputed when
+  a file's size or mtime changes
+
+    python -m bot_core.dedup                  # report clusters without changing anything
+    python -m bot_core.dedup --threshold 0.9
+"""
+import argparse
+import json
+import os
+import zlib
+import numpy as np
+from bot_core.knowledge_index import KNOWLEDGE_DIR, save_atomic
+
+DEDUP_MANIFEST_PATH = os.path.join(KNOWLEDGE_DIR, "dedup_manifest.json")
+ALIASES_PATH = os.path.join(KNOWLEDGE_DIR, "doc_aliases.json")
+NUM_PERM = 128
+BANDS = 32  # 4 rows per band: pairs at Jaccard 0.8 collide in some band with probability ~1
+SHINGLE_WORDS = 5
+THRESHOLD = 0.8
+
+_PRIME = (1 << 31) - 1  # keeps (a * x + b) within uint64
+_rng = np.random.default_rng(1)
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+def shingle_hashes(tokens, size=SHINGLE_WORDS):
+    """Stable 31-bit hashes of the distinct word shingles (the whole text if it is shorter)."""
+    if not tokens:
+        return np.empty(0, dtype=np.uint64)
+    grams = {" ".join(tokens[i:i + size]) for i in range(max(1, len(tokens) - size + 1))}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) % _PRIME for g in grams), dtype=np.uint64, count=len(grams))
+
+def minhash(tokens):
+    """NUM_PERM-value MinHash signature, or None for an empty document."""
+    hashes = shingle_hashes(tokens)
+    if not len(hashes):
+        return None
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME).min(axis=1).astype(np.uint32)
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(a == b))
+
+def find_clusters(signatures, threshold=THRESHOLD, bands=BANDS):
+    """Group names whose signatures are near-duplicates; returns lists of 2+ names."""
+    names = [name for name, sig in signatures.items() if sig is not None]
+    parent = {name: name for name in names}
+
+    def find(name):
+        while parent[name] != name:
+            parent[name] = parent[parent[name]]
+            name = parent[name]
+        return name
+
+    rows = NUM_PERM // bands
+    checked = set()
+    for band in range(bands):
+        buckets = {}
+        for name in names:
+            buckets.setdefault(signatures[name][band * rows:(band + 1) * rows].tobytes(), []).append(name)
+        for bucket in buckets.values():
+            for i, first in enumerate(bucket):
+                for other in bucket[i + 1:]:
+                    if (first, other) in checked or find(first) == find(other):
+                        continue
+                    checked.add((first, other))
+                    if similarity(signatures[first], signatures[other]) >= threshold:
+                        parent[find(other)] = find(first)
+    clusters = {}
+    for name in names:
+        clusters.setdefault(find(name), []).append(name)
+    return [sorted(members) for members in clusters.values() if len(members) > 1]
+
+def canonical(members, lengths):
+    """The document a cluster keeps: the longest, then the first by name."""
+    return min(members, key=lambda name: (-lengths[name], name))
+
+def load_signatures(docs, workers=1, manifest_path=None):
+    """Signature (and token count) of every document, reusing cached ones for unchanged files."""
+    from bot_core.embed_knowledge import iter_tokenized
+    manifest_path = manifest_path or DEDUP_MANIFEST_PATH
+    cached = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            cached = json.load(f)["files"]
+    files = {}
+    stale = []
+    for name, path in docs.items():
+        stat = os.stat(path)
+        entry = cached.get(name)
+        if entry is not None and (entry["size"], entry["mtime"]) == (stat.st_size, stat.st_mtime):
+            files[name] = entry
+        else:
+            stale.append(name)
+    for name, tokens in zip(stale, iter_tokenized([docs[name] for name in stale], workers)):
+        stat = os.stat(docs[name])
+        sig = minhash(tokens)
+        files[name] = {"size": stat.st_size, "mtime": stat.st_mtime, "tokens": len(tokens),
+                       "signature": None if sig is None else sig.tolist()}
+    if stale or len(files) != len(cached):
+        manifest = json.dumps({"num_perm": NUM_PERM, "files": files})
+        save_atomic(manifest_path, lambda f: f.write(manifest.encode("utf-8")))
+    signatures = {name: None if entry["signature"] is None else np.array(entry["signature"], dtype=np.uint32)
+                  for name, entry in files.items()}
+    return signatures, {name: entry["tokens"] for name, entry in files.items()}
+
+def dedup_docs(docs, workers=1, threshold=THRESHOLD, aliases_path=None, write=True):
+    """Drop near-duplicates from docs (name -> path); returns (canonical docs, {alias: canonical})."""
+    signatures, lengths = load_signatures(docs, workers)
+    aliases = {}
+    for members in find_clusters(signatures, threshold):
+        keep = canonical(members, lengths)
+        aliases.update({name: keep for name in members if name != keep})
+    if write:
+        aliases_path = aliases_path or ALIASES_PATH
+        save_atomic(aliases_path, lambda f: f.write(json.dumps(aliases, indent=2, sort_keys=True).encode("utf-8")))
+    if aliases:
+        print(f"Folded {len(aliases)} near-duplicate documents into "
+              f"{len(set(aliases.values()))} canonical ones (see {aliases_path or ALIASES_PATH})")
+    return {name: path for name, path in docs.items() if name not in aliases}, aliases
+
+def load_aliases(aliases_path=None):
+    """canonical name -> [alias names], from the last dedup run ({} if there was none)."""
+    aliases_path = aliases_path or ALIASES_PATH
+    if not os.path.exists(aliases_path):
+        return {}
+    with open(aliases_path, encoding="utf-8") as f:
+        aliases = json.load(f)
+    by_canonical = {}
+    for alias, canonical in sorted(aliases.items()):
+        by_canonical.setdefault(canonical, []).append(alias)
+    return by_canonical
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report near-duplicate documents in the knowledge base.")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="Estimated Jaccard similarity to merge at")
+    parser.add_argument("--workers", type=int, default=1, help="Processes used to read and tokenize files")
+    args = parser.parse_args(argv)
+
+    from bot_core.embed_knowledge import scan_docs
+    docs = scan_docs(workers=args.workers)
+    signatures, lengths = load_signatures(docs, args.workers)
+    clusters = find_clusters(signatures, args.threshold)
+    for members in clusters:
+        keep = canonical(members, lengths)
+        print(f"{keep}: {', '.join(name for name in members if name != keep)}")
+    print(f"{len(docs)} documents, {len(clusters)} near-duplicate clusters, "
+          f"{sum(len(c) - 1 for c in clusters)} redundant copies")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
 """
 Script to download and save high-quality AGI/robotics/AI knowledge sources.
 Saves PDFs, code, and web articles in 'knowledge/docs/'.
+Uses the same fetch layer as knowledge_downloader (bot_core.fetcher): streamed,
+atomic, size-limited downloads with checksums and conditional re-fetching.
 """
 import os
-import requests
+from functools import partial
+from bot_core.fetcher import Fetcher, report
 
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "knowledge", "docs")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -19,49 +22,36 @@ SOURCES = [
     {"type": "web", "url": "https://towardsdatascience.com/a-complete-guide-to-a-star-algorithm-5f8b5952b506", "title": "A* Algorithm Guide"},
 ]
 
-def download_arxiv(arxiv_id, title):
+def download_arxiv(fetcher, arxiv_id, title):
     url = f"https://arxiv.org/pdf/{arxiv_id}.pdf"
     filename = os.path.join(OUTPUT_DIR, f"{title.replace(' ', '_')}.pdf")
-    r = requests.get(url)
-    if r.status_code == 200:
-        with open(filename, "wb") as f:
-            f.write(r.content)
-        print(f"[+] Saved arXiv paper: {filename}")
-    else:
-        print(f"[!] Failed to download arXiv paper: {arxiv_id}")
+    return report(fetcher.fetch(url, filename), "arXiv paper", arxiv_id)
 
-def download_github(repo, file):
+def download_github(fetcher, repo, file):
     url = f"https://raw.githubusercontent.com/{repo}/master/{file}"
     filename = os.path.join(OUTPUT_DIR, f"{repo.replace('/', '_')}_{file.replace('/', '_')}")
-    r = requests.get(url)
-    if r.status_code == 200:
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write(r.text)
-        print(f"[+] Saved GitHub file: {filename}")
-    else:
-        print(f"[!] Failed to download GitHub file: {repo}/{file}")
+    return report(fetcher.fetch(url, filename), "GitHub file", f"{repo}/{file}")
 
-def download_web(url, title):
+def download_web(fetcher, url, title):
     try:
         import trafilatura
     except ImportError:
         print("[!] Please install trafilatura: pip install trafilatura")
-        return
-    downloaded = trafilatura.fetch_url(url)
-    if downloaded:
-        text = trafilatura.extract(downloaded)
-        filename = os.path.join(OUTPUT_DIR, f"{title.replace(' ', '_')}.txt")
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write(text)
-        print(f"[+] Saved web article: {filename}")
-    else:
-        print(f"[!] Failed to download web article: {url}")
+        return None
+    filename = os.path.join(OUTPUT_DIR, f"{title.replace(' ', '_')}.txt")
+    return report(fetcher.fetch(url, filename, trafilatura.extract), "web article", url)
 
 if __name__ == "__main__":
+    fetcher = Fetcher()
+    jobs = []
     for src in SOURCES:
         if src["type"] == "arxiv":
-            download_arxiv(src["id"], src["title"])
+            jobs.append(partial(download_arxiv, fetcher, src["id"], src["title"]))
         elif src["type"] == "github":
-            download_github(src["repo"], src["file"])
+            jobs.append(partial(download_github, fetcher, src["repo"], src["file"]))
         elif src["type"] == "web":
-            download_web(src["url"], src["title"])
+            jobs.append(partial(download_web, fetcher, src["url"], src["title"]))
+    try:
+        fetcher.run(jobs)
+    finally:
+        fetcher.close()
@@ -1,50 +1,355 @@
 """
 Train a custom 300-dimensional embedding model on your knowledge base documents.
-- Loads all .txt files from bot_core/knowledge/docs/
+- Loads all .txt files from bot_core/knowledge/docs/, plus text extracted from PDFs,
+  Markdown and code files there (see bot_core.extract_text)
 - Trains a Word2Vec model (gensim) with 300 dimensions
-- Saves the model and outputs a 300-dim embedding for each document (by averaging word vectors)
+- Saves the model, an inference-only copy of its word vectors (word_vectors.kv, loadable
+  with mmap='r' by bot_core.search_knowledge), and outputs a 300-dim embedding for each document (by averaging word vectors)
+- Keeps a manifest of content hashes so later runs only re-embed new or changed files
+- Skips near-duplicate documents first, keeping one canonical copy (see bot_core.dedup)
+
+    python -m bot_core.embed_knowledge                  # incremental (full build on first run)
+    python -m bot_core.embed_knowledge --update-model   # continue Word2Vec training on changed docs, re-embed all
+    python -m bot_core.embed_knowledge --full           # retrain and re-embed everything
+    python -m bot_core.embed_knowledge --full --weighting sif --workers 4
+    python -m bot_core.embed_knowledge --benchmark      # per-word loop vs batched embedding
+    python -m bot_core.embed_knowledge --passages       # also build the passage-level index
+    python -m bot_core.embed_knowledge --no-dedup       # embed near-duplicates too
 """
-import os
+import argparse
 import glob
+import hashlib
+import json
+import os
+import multiprocessing
+import tempfile
+import time
 import numpy as np
-from gensim.models import Word2Vec
-from gensim.utils import simple_preprocess
+from bot_core.knowledge_index import save_atomic
 
-DOCS_DIR = os.path.join(os.path.dirname(__file__), "knowledge", "docs")
+KNOWLEDGE_DIR = os.path.join(os.path.dirname(__file__), "knowledge")
+DOCS_DIR = os.path.join(KNOWLEDGE_DIR, "docs")
 EMBED_DIM = 300
-MODEL_PATH = os.path.join(os.path.dirname(__file__), "knowledge", "custom_word2vec.model")
-EMBEDDINGS_PATH = os.path.join(os.path.dirname(__file__), "knowledge", "doc_embeddings.npy")
-FILENAMES_PATH = os.path.join(os.path.dirname(__file__), "knowledge", "doc_filenames.txt")
-
-# 1. Load and preprocess documents
-documents = []
-filenames = []
-for path in glob.glob(os.path.join(DOCS_DIR, "*.txt")):
+MODEL_PATH = os.path.join(KNOWLEDGE_DIR, "custom_word2vec.model")
+KEYED_VECTORS_PATH = os.path.join(KNOWLEDGE_DIR, "word_vectors.kv")
+EMBEDDINGS_PATH = os.path.join(KNOWLEDGE_DIR, "doc_embeddings.npy")
+FILENAMES_PATH = os.path.join(KNOWLEDGE_DIR, "doc_filenames.txt")
+MANIFEST_PATH = os.path.join(KNOWLEDGE_DIR, "embed_manifest.json")
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def tokenize(path):
+    from gensim.utils import simple_preprocess
     with open(path, encoding="utf-8") as f:
-        text = f.read()
-        tokens = simple_preprocess(text)
-        if tokens:
-            documents.append(tokens)
-            filenames.append(os.path.basename(path))
-
-# 2. Train Word2Vec model
-print(f"Training Word2Vec on {len(documents)} documents...")
-model = Word2Vec(sentences=documents, vector_size=EMBED_DIM, window=8, min_count=2, workers=4, sg=1)
-model.save(MODEL_PATH)
-print(f"Model saved to {MODEL_PATH}")
-
-# 3. Compute document embeddings (average word vectors)
-doc_embeddings = []
-for tokens in documents:
+        return simple_preprocess(f.read())
+
+def scan_docs(docs_dir=None, workers=1):
+    """Map document name -> plain-text path, running the extraction stage for non-.txt sources."""
+    from bot_core.extract_text import extract_all
+    docs_dir = docs_dir or DOCS_DIR
+    docs = {os.path.basename(p): p for p in glob.glob(os.path.join(docs_dir, "*.txt"))}
+    docs.update(extract_all(docs_dir, workers))
+    return dict(sorted(docs.items()))
+
+def iter_tokenized(paths, workers=1):
+    """Yield the tokens of each file lazily, in order; tokenizes in a process pool when workers > 1."""
+    if workers <= 1:
+        for path in paths:
+            yield tokenize(path)
+        return
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap(tokenize, paths, chunksize=8)
+
+def tokenize_all(paths, workers=1):
+    """Tokenize files, in a process pool when workers > 1. Results keep the order of paths."""
+    return list(iter_tokenized(paths, workers))
+
+def write_corpus(docs, path, workers=1):
+    """Tokenize every document once into a line corpus at path, one space-joined document per line.
+
+    Word2Vec makes several passes over its corpus; reading them back from this file
+    keeps memory flat without re-tokenizing. Returns (names in line order, empty names).
+    """
+    names, empty = [], []
+    with open(path, "w", encoding="utf-8") as f:
+        for name, tokens in zip(docs, iter_tokenized(list(docs.values()), workers)):
+            if tokens:
+                f.write(" ".join(tokens) + "\n")
+                names.append(name)
+            else:
+                empty.append(name)
+    return names, empty
+
+def read_corpus(path):
+    """Token lists of a corpus written by write_corpus, in order."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            yield line.split()
+
+def document_vector(model, tokens):
+    # Average of the word vectors; zeros if no token is in the vocabulary
     vectors = [model.wv[word] for word in tokens if word in model.wv]
     if vectors:
-        doc_vec = np.mean(vectors, axis=0)
+        return np.mean(vectors, axis=0)
+    return np.zeros(EMBED_DIM)
+
+def word_weights(model, documents, weighting, sif_a=1e-3):
+    """Per-vocabulary-word weights; None means a plain mean."""
+    if weighting == "mean":
+        return None
+    wv = model.wv
+    if weighting == "sif":
+        # Smooth inverse frequency (Arora et al., 2017): a / (a + p(w)), p from the training counts
+        counts = np.array([wv.get_vecattr(word, "count") for word in wv.index_to_key], dtype=np.float64)
+        return sif_a / (sif_a + counts / counts.sum())
+    if weighting == "tfidf":
+        # Term frequency comes from repeated tokens; idf from the documents passed in
+        df = np.zeros(len(wv.index_to_key), dtype=np.float64)
+        num_docs = 0
+        for tokens in documents:
+            df[np.unique(token_indices(model, tokens))] += 1
+            num_docs += 1
+        return np.log((1 + num_docs) / (1 + df)) + 1
+    raise ValueError(f"Unknown weighting: {weighting}")
+
+def token_indices(model, tokens):
+    key_to_index = model.wv.key_to_index
+    return np.fromiter((key_to_index[word] for word in tokens if word in key_to_index), dtype=np.int64)
+
+def document_vectors(model, documents, weighting="mean", weights=None):
+    """Weighted mean word vector of every document in one sparse (docs x vocab) @ vectors product.
+
+    weights (from word_weights) can be passed in to keep corpus-level weighting
+    consistent when documents are embedded in batches.
+    """
+    from scipy.sparse import csr_matrix
+    vectors = model.wv.vectors
+    indices = [token_indices(model, tokens) for tokens in documents]
+    indptr = np.zeros(len(documents) + 1, dtype=np.int64)
+    np.cumsum([len(idx) for idx in indices], out=indptr[1:])
+    columns = np.concatenate(indices) if indices else np.empty(0, dtype=np.int64)
+    if weights is None:
+        weights = word_weights(model, documents, weighting)
+    data = np.ones(len(columns), dtype=np.float64) if weights is None else weights[columns]
+    # Duplicate (doc, word) entries are summed, so repeated words count once per occurrence
+    matrix = csr_matrix((data, columns, indptr), shape=(len(documents), len(vectors)))
+    totals = np.asarray(matrix.sum(axis=1)).ravel()
+    sums = matrix @ vectors
+    return (sums / np.where(totals == 0, 1, totals)[:, None]).astype(np.float32)
+
+def benchmark(docs, model_path=None, workers=1):
+    """Time the per-word list path against the batched path on the docs directory."""
+    from gensim.models import Word2Vec
+    model = Word2Vec.load(model_path or MODEL_PATH)
+    paths = list(docs.values())
+    start = time.perf_counter()
+    documents = [tokens for tokens in tokenize_all(paths, workers) if tokens]
+    tokenize_time = time.perf_counter() - start
+    start = time.perf_counter()
+    loop = np.stack([document_vector(model, tokens) for tokens in documents])
+    loop_time = time.perf_counter() - start
+    start = time.perf_counter()
+    batched = document_vectors(model, documents)
+    batched_time = time.perf_counter() - start
+    tokens = sum(len(d) for d in documents)
+    print(f"{len(documents)} documents, {tokens} tokens; tokenized in {tokenize_time:.3f}s with {workers} worker(s)")
+    print(f"per-word loop: {loop_time:.3f}s | batched: {batched_time:.3f}s "
+          f"({loop_time / max(batched_time, 1e-9):.1f}x) | max abs diff {np.abs(loop - batched).max():.2e}")
+
+def train_model(corpus_file, count):
+    """Train Word2Vec on a line corpus (see write_corpus) of count documents."""
+    from gensim.models import Word2Vec
+    print(f"Training Word2Vec on {count} documents...")
+    model = Word2Vec(corpus_file=corpus_file, vector_size=EMBED_DIM, window=8, min_count=2, workers=4, sg=1)
+    model.save(MODEL_PATH)
+    print(f"Model saved to {MODEL_PATH}")
+    export_keyed_vectors(model)
+    return model
+
+def export_keyed_vectors(model, path=KEYED_VECTORS_PATH):
+    """Save just the word vectors (no training state), with the vector array in its own
+    .npy file so searchers can load it with mmap='r' and share the pages between processes."""
+    model.wv.save(path, separately=["vectors"])
+    print(f"Word vectors exported to {path}")
+
+def load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return None
+    with open(MANIFEST_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_index(embeddings, row_names, manifest):
+    """Write embeddings, doc_filenames.txt (one line per row, blank for tombstones) and the manifest."""
+    save_atomic(EMBEDDINGS_PATH, lambda f: np.save(f, embeddings))
+    save_atomic(FILENAMES_PATH, lambda f: f.write("".join(name + "\n" for name in row_names).encode("utf-8")))
+    save_atomic(MANIFEST_PATH, lambda f: f.write(json.dumps(manifest, indent=2).encode("utf-8")))
+
+def _file_entry(path, row):
+    stat = os.stat(path)
+    return {"sha256": file_hash(path), "size": stat.st_size, "mtime": stat.st_mtime, "row": row}
+
+def embed_full(docs, weighting="mean", workers=1, batch_size=256):
+    """Retrain the model and re-embed every document (the original behaviour).
+
+    Documents are tokenized once into a temporary line corpus that Word2Vec trains
+    from; the embedding pass re-reads it batch_size documents at a time.
+    """
+    fd, corpus_path = tempfile.mkstemp(suffix=".corpus.txt", dir=KNOWLEDGE_DIR)
+    os.close(fd)
+    try:
+        names, empty = write_corpus(docs, corpus_path, workers)
+        model = train_model(corpus_path, len(names))
+        weights = word_weights(model, read_corpus(corpus_path), weighting)
+        batches, batch = [], []
+        for tokens in read_corpus(corpus_path):
+            batch.append(tokens)
+            if len(batch) == batch_size:
+                batches.append(document_vectors(model, batch, weighting, weights))
+                batch = []
+        if batch:
+            batches.append(document_vectors(model, batch, weighting, weights))
+    finally:
+        os.remove(corpus_path)
+    embeddings = np.concatenate(batches) if batches else np.zeros((0, EMBED_DIM), dtype=np.float32)
+    files = {name: _file_entry(docs[name], row) for row, name in enumerate(names)}
+    # Empty documents are not indexed but are remembered so incremental runs skip them
+    files.update({name: _file_entry(docs[name], None) for name in empty})
+    manifest = {"weighting": weighting, "files": files}
+    save_index(embeddings, names, manifest)
+    print(f"Saved {len(embeddings)} document embeddings to {EMBEDDINGS_PATH}")
+
+def embed_incremental(docs, manifest, update_model=False, workers=1):
+    """Re-embed only new or changed documents; deleted ones are tombstoned and their rows reused.
+
+    With update_model, Word2Vec training continues on the changed documents and then
+    every indexed document is re-embedded, since the update moves all word vectors.
+    """
+    from gensim.models import Word2Vec
+    files = manifest["files"]
+    embeddings = np.load(EMBEDDINGS_PATH)
+    row_names = [""] * len(embeddings)
+    for name, entry in files.items():
+        if entry["row"] is not None:
+            row_names[entry["row"]] = name
+
+    changed = []
+    for name, path in docs.items():
+        entry = files.get(name)
+        if entry is not None:
+            stat = os.stat(path)
+            # Size and mtime unchanged: trust the stored hash without re-reading the file
+            if (stat.st_size, stat.st_mtime) == (entry["size"], entry["mtime"]):
+                continue
+            if file_hash(path) == entry["sha256"]:
+                entry["mtime"] = stat.st_mtime
+                continue
+        changed.append(name)
+    removed = [name for name in files if name not in docs]
+    for name in removed:
+        row = files.pop(name)["row"]
+        if row is not None:
+            embeddings[row] = 0
+            row_names[row] = ""
+    if not changed:
+        if removed:
+            save_index(embeddings, row_names, manifest)
+        print(f"No new or changed documents ({len(removed)} removed).")
+        return
+
+    tokenized = dict(zip(changed, tokenize_all([docs[name] for name in changed], workers)))
+    model = Word2Vec.load(MODEL_PATH)
+    if update_model:
+        new_docs = [tokens for tokens in tokenized.values() if tokens]
+        model.build_vocab(new_docs, update=True)
+        model.train(new_docs, total_examples=len(new_docs), epochs=model.epochs)
+        model.save(MODEL_PATH)
+        print(f"Continued Word2Vec training on {len(new_docs)} documents; model saved to {MODEL_PATH}")
+        export_keyed_vectors(model)
+        # Training moved every word vector: re-embed the unchanged documents too, so all
+        # rows live in the updated model's space
+        unchanged = [name for name in docs if name not in tokenized and files.get(name, {}).get("row") is not None]
+        tokenized.update(zip(unchanged, tokenize_all([docs[name] for name in unchanged], workers)))
+        changed += unchanged
+
+    embedded = [name for name in changed if tokenized[name]]
+    vectors = dict(zip(embedded, document_vectors(model, [tokenized[name] for name in embedded],
+                                                  manifest.get("weighting", "mean"))))
+    free_rows = [row for row, name in enumerate(row_names) if not name]
+    new_rows = []
+    for name in changed:
+        tokens = tokenized[name]
+        row = files[name]["row"] if name in files else None
+        if not tokens:
+            # Empty documents are not indexed (same as a full build) but are remembered as seen
+            if row is not None:
+                embeddings[row] = 0
+                row_names[row] = ""
+            files[name] = _file_entry(docs[name], None)
+            continue
+        if row is None and free_rows:
+            row = free_rows.pop(0)
+        vector = vectors[name]
+        if row is None:
+            row = len(row_names) + len(new_rows)
+            new_rows.append(vector)
+        else:
+            embeddings[row] = vector
+        files[name] = _file_entry(docs[name], row)
+    if new_rows:
+        embeddings = np.concatenate([embeddings, np.stack(new_rows).astype(embeddings.dtype)])
+        row_names.extend([""] * len(new_rows))
+    for name, entry in files.items():
+        if entry["row"] is not None:
+            row_names[entry["row"]] = name
+    save_index(embeddings, row_names, manifest)
+    print(f"Re-embedded {len(changed)} documents, removed {len(removed)}; "
+          f"{len(embeddings) - row_names.count('')} indexed in {EMBEDDINGS_PATH}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Embed the knowledge base documents.")
+    parser.add_argument("--full", action="store_true", help="Retrain Word2Vec and re-embed every document")
+    parser.add_argument("--update-model", action="store_true",
+                        help="Continue Word2Vec training on changed documents (then re-embeds every document) "
+                             "instead of reusing the model as-is")
+    parser.add_argument("--weighting", choices=["mean", "sif", "tfidf"], default=None,
+                        help="Word weighting for document vectors (default: keep the manifest's, else mean)")
+    parser.add_argument("--workers", type=int, default=1, help="Processes used to read and tokenize files")
+    parser.add_argument("--benchmark", action="store_true", help="Compare embedding paths on the docs directory")
+    parser.add_argument("--passages", action="store_true",
+                        help="Also chunk documents into overlapping passages and index them")
+    parser.add_argument("--no-dedup", action="store_true", help="Embed near-duplicate documents instead of skipping them")
+    args = parser.parse_args(argv)
+
+    docs = scan_docs(workers=args.workers)
+    if args.benchmark:
+        benchmark(docs, workers=args.workers)
+        return
+    if not args.no_dedup:
+        from bot_core.dedup import dedup_docs
+        # Aliases are dropped from docs, so their old rows are tombstoned like deleted files
+        docs, _ = dedup_docs(docs, args.workers)
+    manifest = load_manifest()
+    weighting = args.weighting or (manifest or {}).get("weighting", "mean")
+    # tf-idf weights depend on the whole corpus, so they can only be built in one go
+    if (args.full or manifest is None or weighting == "tfidf" or weighting != manifest.get("weighting", "mean")
+            or not os.path.exists(MODEL_PATH) or not os.path.exists(EMBEDDINGS_PATH)):
+        embed_full(docs, weighting, args.workers)
     else:
-        doc_vec = np.zeros(EMBED_DIM)
-    doc_embeddings.append(doc_vec)
-doc_embeddings = np.stack(doc_embeddings)
-np.save(EMBEDDINGS_PATH, doc_embeddings)
-with open(FILENAMES_PATH, "w", encoding="utf-8") as f:
-    for fname in filenames:
-        f.write(fname + "\n")
-print(f"Saved {len(doc_embeddings)} document embeddings to {EMBEDDINGS_PATH}")
+        embed_incremental(docs, manifest, update_model=args.update_model, workers=args.workers)
+    if not os.path.exists(KEYED_VECTORS_PATH) or os.path.getmtime(KEYED_VECTORS_PATH) < os.path.getmtime(MODEL_PATH):
+        # Models trained before word_vectors.kv existed
+        from gensim.models import Word2Vec
+        export_keyed_vectors(Word2Vec.load(MODEL_PATH))
+    if args.passages:
+        from gensim.models import Word2Vec
+        from bot_core.passages import build_passage_index
+        build_passage_index(docs, Word2Vec.load(MODEL_PATH),
+                            lambda model, token_lists: document_vectors(model, token_lists, weighting))
+
+if __name__ == "__main__":
+    main()
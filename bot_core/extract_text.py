@@ -0,0 +1,131 @@
+"""
+Text extraction stage for the knowledge base.
+- Converts PDFs (pypdf), Markdown/reStructuredText and code files in knowledge/docs/
+  to normalized plain text under knowledge/extracted/<name>.txt
+- Runs in a process pool and skips sources whose content hash has not changed
+- .txt documents are used in place and never copied
+"""
+import glob
+import json
+import os
+import re
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from bot_core.embed_knowledge import file_hash
+
+PDF_EXTENSIONS = {".pdf"}
+MARKUP_EXTENSIONS = {".md", ".markdown", ".rst"}
+CODE_EXTENSIONS = {".py", ".js", ".ts", ".java", ".c", ".cc", ".cpp", ".h", ".hpp", ".go", ".rs", ".m"}
+EXTRACT_EXTENSIONS = PDF_EXTENSIONS | MARKUP_EXTENSIONS | CODE_EXTENSIONS
+MANIFEST_NAME = "extract_manifest.json"
+
+def extracted_dir(docs_dir):
+    return os.path.join(os.path.dirname(os.path.abspath(docs_dir)), "extracted")
+
+def text_path(docs_dir, name):
+    """Path of the plain text behind a document name (the file itself for .txt)."""
+    if name.endswith(".txt"):
+        return os.path.join(docs_dir, name)
+    return os.path.join(extracted_dir(docs_dir), name + ".txt")
+
+def normalize_text(text):
+    text = unicodedata.normalize("NFKC", text)
+    # Re-join words hyphenated across line breaks (common in PDF output)
+    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)
+    text = re.sub(r"[ \t\f\v]+", " ", text)
+    text = re.sub(r" *\n *", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+def strip_markup(text):
+    text = re.sub(r"!\[([^\]]*)\]\([^)]*\)", r"\1", text)  # images
+    text = re.sub(r"\[([^\]]+)\]\([^)]*\)", r"\1", text)  # links
+    text = re.sub(r"<[^>]+>", " ", text)  # inline HTML
+    text = re.sub(r"^\s{0,3}(#{1,6}|>|[-*+]|\d+\.)\s+", "", text, flags=re.M)  # headings, quotes, lists
+    text = re.sub(r"^[=\-~`*_#^\"]{3,}\s*$", "", text, flags=re.M)  # rules, rst underlines, fences
+    return re.sub(r"[*_`]+", "", text)
+
+def extract_pdf(path):
+    from pypdf import PdfReader
+    reader = PdfReader(path)
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+def extract(path):
+    """Normalized text of one source file."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in PDF_EXTENSIONS:
+        text = extract_pdf(path)
+    else:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            text = f.read()
+        if ext in MARKUP_EXTENSIONS:
+            text = strip_markup(text)
+    return normalize_text(text)
+
+def _extract_to(path, out_path):
+    # Worker: returns an error string instead of raising so one bad PDF does not stop the pool
+    try:
+        text = extract(path)
+    except ImportError:
+        return "pypdf is not installed (pip install pypdf)"
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, out_path)
+    return None
+
+def extract_all(docs_dir, workers=1):
+    """Extract every non-.txt source in docs_dir; returns {name: text_path} for usable ones."""
+    out_dir = extracted_dir(docs_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+
+    sources = {os.path.basename(p): p for p in sorted(glob.glob(os.path.join(docs_dir, "*")))
+               if os.path.splitext(p)[1].lower() in EXTRACT_EXTENSIONS}
+    pending = []
+    for name, path in sources.items():
+        entry = manifest.get(name)
+        stat = os.stat(path)
+        # Failed extractions are remembered too, so a broken file is only retried once it changes
+        if entry and (entry.get("error") or os.path.exists(text_path(docs_dir, name))):
+            if (stat.st_size, stat.st_mtime) == (entry["size"], entry["mtime"]):
+                continue
+            sha256 = file_hash(path)
+            if sha256 == entry["sha256"]:
+                entry["mtime"] = stat.st_mtime
+                continue
+        else:
+            sha256 = file_hash(path)
+        manifest[name] = {"sha256": sha256, "size": stat.st_size, "mtime": stat.st_mtime}
+        pending.append(name)
+    for name in [n for n in manifest if n not in sources]:
+        del manifest[name]
+        if os.path.exists(text_path(docs_dir, name)):
+            os.remove(text_path(docs_dir, name))
+
+    args = [(sources[name], text_path(docs_dir, name)) for name in pending]
+    if workers > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            errors = list(pool.map(_extract_to, *zip(*args)))
+    else:
+        errors = [_extract_to(*a) for a in args]
+    for name, error in zip(pending, errors):
+        if error:
+            print(f"[!] Could not extract text from {name}: {error}")
+            manifest[name]["error"] = error
+            if os.path.exists(text_path(docs_dir, name)):
+                os.remove(text_path(docs_dir, name))
+    if pending:
+        print(f"Extracted text from {len(pending) - sum(map(bool, errors))} of {len(pending)} changed sources")
+
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+    return {name: text_path(docs_dir, name) for name in sources if not manifest[name].get("error")}
@@ -0,0 +1,192 @@
+"""
+Shared HTTP fetch layer for the knowledge downloaders.
+- One pooled requests.Session with retries and exponential backoff
+- A thread pool with a per-host concurrency limit
+- ETag / Last-Modified conditional requests backed by a JSON cache manifest,
+  so unchanged sources are not downloaded again
+- Bodies are streamed in chunks to a temp file and renamed into place, with a
+  size limit and a sha256 recorded per file
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+KNOWLEDGE_DIR = os.path.join(os.path.dirname(__file__), "knowledge")
+CACHE_MANIFEST_PATH = os.path.join(KNOWLEDGE_DIR, "download_manifest.json")
+USER_AGENT = "ThinkBotAGI/1.0 (sagar200422@gmail.com)"
+CHUNK_SIZE = 64 * 1024
+MAX_BYTES = 100 * 1024 * 1024
+
+FetchResult = namedtuple("FetchResult", ["url", "status", "path", "http_status", "sha256"])
+# status is one of "saved", "not_modified" or "failed"
+
+class TooLarge(Exception):
+    pass
+
+def report(result, kind, label):
+    """Print one line per download and pass the result through."""
+    if result.status == "saved":
+        print(f"[+] Saved {kind}: {result.path}")
+    elif result.status == "not_modified":
+        print(f"[=] Unchanged {kind}: {result.path}")
+    else:
+        print(f"[!] Failed to download {kind}: {label} (status: {result.http_status}, url: {result.url})")
+    return result
+
+def decode_body(body, content_type):
+    """Decode with the header's charset; without one (requests would assume ISO-8859-1 for
+    text/*), try UTF-8 and fall back to the detected encoding."""
+    charset = requests.utils.get_encoding_from_headers({"content-type": content_type})
+    if charset and "charset" in content_type.lower():
+        try:
+            return body.decode(charset, errors="replace")
+        except LookupError:
+            pass  # unknown charset name: detect it instead
+    try:
+        return body.decode("utf-8")
+    except UnicodeDecodeError:
+        detected = requests.compat.chardet.detect(body)["encoding"] if requests.compat.chardet else None
+        return body.decode(detected or "utf-8", errors="replace")
+
+def write_atomic(path, chunks):
+    """Write an iterable of byte chunks to path via a temp file; returns (size, sha256)."""
+    tmp_path = path + ".part"
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return size, digest.hexdigest()
+
+class Fetcher:
+    """Concurrent, resumable downloads that share one connection pool."""
+    def __init__(self, manifest_path=CACHE_MANIFEST_PATH, max_workers=8, per_host=2, retries=3,
+                 backoff=0.5, timeout=30, user_agent=USER_AGENT, max_bytes=MAX_BYTES):
+        self.manifest_path = manifest_path
+        self.max_bytes = max_bytes
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = user_agent
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset(["GET", "HEAD"]), respect_retry_after_header=True)
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.manifest = self._load_manifest()
+        self._lock = threading.Lock()
+        self._host_slots = defaultdict(lambda: threading.BoundedSemaphore(self.per_host))
+
+    def _load_manifest(self):
+        if self.manifest_path and os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+        return {}
+
+    def save_manifest(self):
+        if not self.manifest_path:
+            return
+        with self._lock:
+            data = json.dumps(self.manifest, indent=2)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.manifest_path)
+
+    def host_slot(self, url):
+        """Semaphore limiting concurrent requests to url's host."""
+        host = urlsplit(url).netloc
+        with self._lock:
+            return self._host_slots[host]
+
+    def _conditional_headers(self, url, path):
+        entry = self.manifest.get(url)
+        # Validators are only useful if the file they describe is still on disk
+        if not entry or entry.get("path") != path or not os.path.exists(path):
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def _limited_chunks(self, response, max_bytes):
+        total = 0
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            total += len(chunk)
+            if max_bytes and total > max_bytes:
+                raise TooLarge(f"body exceeds {max_bytes} bytes")
+            yield chunk
+
+    def fetch(self, url, path, transform=None, accept=None, max_bytes=None):
+        """Download url into path unless the server says it has not changed.
+
+        The body is streamed to disk unless transform is given: then the (size
+        limited) body is decoded and transform(text) returns the str to save,
+        or None to reject it. accept(response) can reject a response from its
+        headers before any of the body is read.
+        """
+        max_bytes = max_bytes or self.max_bytes
+        headers = self._conditional_headers(url, path)
+        try:
+            with self.host_slot(url), self.session.get(url, headers=headers, timeout=self.timeout,
+                                                       stream=True) as r:
+                if r.status_code == 304:
+                    return FetchResult(url, "not_modified", path, 304, self.manifest[url].get("sha256"))
+                if r.status_code != 200 or (accept and not accept(r)):
+                    return FetchResult(url, "failed", path, r.status_code, None)
+                length = r.headers.get("Content-Length")
+                if max_bytes and length and length.isdigit() and int(length) > max_bytes:
+                    raise TooLarge(f"Content-Length {length} exceeds {max_bytes} bytes")
+                chunks = self._limited_chunks(r, max_bytes)
+                if transform is not None:
+                    text = transform(decode_body(b"".join(chunks), r.headers.get("Content-Type", "")))
+                    if text is None:
+                        return FetchResult(url, "failed", path, r.status_code, None)
+                    chunks = [text.encode("utf-8")]
+                size, sha256 = write_atomic(path, chunks)
+                etag, last_modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+        except TooLarge as e:
+            print(f"[!] Skipped {url}: {e}")
+            return FetchResult(url, "failed", path, None, None)
+        except requests.RequestException as e:
+            print(f"[!] Request failed: {url} ({e})")
+            return FetchResult(url, "failed", path, None, None)
+        with self._lock:
+            self.manifest[url] = {"path": path, "etag": etag, "last_modified": last_modified,
+                                  "size": size, "sha256": sha256}
+        return FetchResult(url, "saved", path, 200, sha256)
+
+    def run(self, jobs):
+        """Run callables concurrently and return their results in order; the manifest is saved afterwards."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(job) for job in jobs]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    print(f"[!] Download job failed: {e}")
+                    results.append(None)
+        self.save_manifest()
+        return results
+
+    def close(self):
+        self.session.close()
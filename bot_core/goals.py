@@ -2,16 +2,92 @@
 Goal management module for AGI bot core.
 Implements GoalManager class.
 """
+import heapq
+import itertools
+import json
+import math
+import os
+
+GOALS_DB_PATH = os.path.join(os.path.dirname(__file__), "goals_db.json")
 
 class GoalManager:
-    """Manages goals, priorities, and progress."""
-    def __init__(self):
-        self.goals = []
-    def add_goal(self, goal):
-        self.goals.append({'goal': goal, 'status': 'pending'})
+    """Manages goals, priorities, and progress.
+
+    Goals live in a dict keyed by goal (O(1) status updates) and a heap ordered
+    by (-priority, deadline, insertion order), so pop_next_goal is O(log n).
+    Heap entries for completed or re-prioritised goals are skipped lazily.
+    The snapshot at path (goals_db.json by default) is loaded on start if it
+    exists; save() writes it back.
+    """
+    def __init__(self, path=None):
+        self.path = path or GOALS_DB_PATH
+        self.goals = {}    # goal -> {'goal', 'status', 'priority', 'deadline'}
+        self._active = {}  # goal -> entry, for goals not yet completed
+        self._heap = []    # (-priority, deadline, seq, goal) for pending goals
+        self._queued = {}  # goal -> seq of its live heap entry
+        self._counter = itertools.count()
+        if os.path.exists(self.path):
+            self.load()
+    def add_goal(self, goal, priority=0, deadline=None):
+        """Add a goal, or update the priority/deadline of an existing one (re-queuing it)."""
+        entry = {'goal': goal, 'status': 'pending', 'priority': priority, 'deadline': deadline}
+        self.goals[goal] = entry
+        self._active[goal] = entry
+        self._push(entry)
+    def _push(self, entry):
+        seq = next(self._counter)
+        deadline = math.inf if entry['deadline'] is None else entry['deadline']
+        heapq.heappush(self._heap, (-entry['priority'], deadline, seq, entry['goal']))
+        self._queued[entry['goal']] = seq
+        if len(self._heap) > 2 * len(self._queued) + 32:
+            self._heap = [item for item in self._heap if self._queued.get(item[3]) == item[2]]
+            heapq.heapify(self._heap)
+    def _prune(self):
+        while self._heap and self._queued.get(self._heap[0][3]) != self._heap[0][2]:
+            heapq.heappop(self._heap)
     def get_active_goals(self):
-        return [g for g in self.goals if g['status'] == 'pending']
+        return list(self._active.values())
+    def get_goal(self, goal):
+        return self.goals.get(goal)
+    def next_goal(self):
+        """Highest-priority pending goal (earliest deadline breaks ties), without removing it."""
+        self._prune()
+        return self.goals[self._heap[0][3]] if self._heap else None
+    def pop_next_goal(self):
+        """Take the next pending goal off the queue and mark it in progress."""
+        self._prune()
+        if not self._heap:
+            return None
+        goal = heapq.heappop(self._heap)[3]
+        del self._queued[goal]
+        entry = self.goals[goal]
+        entry['status'] = 'in_progress'
+        return entry
     def complete_goal(self, goal):
-        for g in self.goals:
-            if g['goal'] == goal:
-                g['status'] = 'completed'
+        entry = self.goals.get(goal)
+        if entry is None:
+            return
+        entry['status'] = 'completed'
+        self._active.pop(goal, None)
+        self._queued.pop(goal, None)
+    def save(self, path=None):
+        path = path or self.path
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"goals": list(self.goals.values())}, f, indent=2)
+        os.replace(tmp, path)
+    def load(self, path=None):
+        with open(path or self.path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        for entry in snapshot.get("goals", []):
+            entry.setdefault('priority', 0)
+            entry.setdefault('deadline', None)
+            goal = entry['goal']
+            self.goals[goal] = entry
+            if entry['status'] == 'completed':
+                continue
+            self._active[goal] = entry
+            if entry['status'] == 'pending':
+                self._push(entry)
+    def __len__(self):
+        return len(self._active)
@@ -1,66 +1,239 @@
 """
-Inspect the shape of your document embeddings and (optionally) upload them to Pinecone.
-"""
+Inspect the shape of your document embeddings and (optionally) sync them to Pinecone.
 
-import numpy as np
+Only vectors whose content changed since the last sync are uploaded, in batches
+bounded by vector count and request size, on a few concurrent workers; vectors of
+removed documents are deleted. Per-id hashes of what was last uploaded are kept
+next to the embeddings (doc_embeddings_sync.json).
+
+    python -m bot_core.inspect_embeddings            # sync doc embeddings
+    python -m bot_core.inspect_embeddings --passages # sync passage embeddings (own "passages" namespace)
+    python -m bot_core.inspect_embeddings --dry-run  # just report what would change
 
-from dotenv import load_dotenv
+Any object with Pinecone's upsert(vectors=[(id, values), ...], namespace=...) /
+delete(ids=[...], namespace=...) interface works as the target, e.g. LocalVectorStore for tests.
+"""
+import argparse
+import hashlib
+import json
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+from bot_core.knowledge_index import EMBEDDINGS_PATH, FILENAMES_PATH
+from bot_core.passages import PASSAGE_EMBEDDINGS_PATH, PASSAGE_IDS_PATH, PASSAGE_NAMESPACE
+
+MAX_BATCH_VECTORS = 100
+MAX_BATCH_BYTES = 2 * 1024 * 1024  # Pinecone's per-request limit
+MAX_DELETE_IDS = 1000
+
+class LocalVectorStore:
+    """In-memory stand-in for a Pinecone index; namespaces[ns] maps id -> values ("" is the default)."""
+    def __init__(self):
+        self.namespaces = {}
+        self.requests = 0
+    @property
+    def vectors(self):
+        return self.namespaces.setdefault("", {})
+    def upsert(self, vectors, namespace=""):
+        self.requests += 1
+        for vid, values in vectors:
+            self.namespaces.setdefault(namespace, {})[vid] = list(values)
+    def delete(self, ids, namespace=""):
+        self.requests += 1
+        for vid in ids:
+            self.namespaces.get(namespace, {}).pop(vid, None)
+
+def sync_state_path(embeddings_path):
+    return os.path.splitext(embeddings_path)[0] + "_sync.json"
+
+def load_sync_state(path, index_name):
+    """(namespace, hashes) recorded by the last sync to index_name; ("", {}) if none or another index."""
+    if not os.path.exists(path):
+        return "", {}
+    with open(path, encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("index") != index_name:
+        return "", {}
+    return state.get("namespace", ""), state.get("vectors", {})
+
+def save_sync_state(path, index_name, hashes, namespace=""):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"index": index_name, "namespace": namespace, "vectors": hashes}, f)
+    os.replace(tmp_path, path)
 
-# Load embeddings
-embeddings = np.load("bot_core/knowledge/doc_embeddings.npy")
-print(f"Embeddings shape: {embeddings.shape}")
+def load_vectors(embeddings_path=EMBEDDINGS_PATH, ids_path=FILENAMES_PATH):
+    embeddings = np.load(embeddings_path, mmap_mode="r")
+    with open(ids_path, encoding="utf-8") as f:
+        ids = [line.rstrip("\n") for line in f]
+    return embeddings, ids
 
+def vector_hash(vector):
+    return hashlib.sha1(np.ascontiguousarray(vector, dtype=np.float32).tobytes()).hexdigest()
 
-# Upload to Pinecone using credentials from .env
-load_dotenv()
-api_key = os.getenv("VECTOR_DB_API_KEY")
-url = os.getenv("VECTOR_DB_URL")
+def plan_sync(embeddings, ids, synced):
+    """Return (rows to upsert as [(id, row)], ids to delete, current hashes). Blank ids are tombstones."""
+    current = {}
+    upserts = []
+    for row, vid in enumerate(ids):
+        if not vid:
+            continue
+        digest = vector_hash(embeddings[row])
+        current[vid] = digest
+        if synced.get(vid) != digest:
+            upserts.append((vid, row))
+    deletes = [vid for vid in synced if vid not in current]
+    return upserts, deletes, current
 
-if api_key and url:
-    # Parse index name and environment from URL
+def upsert_batches(upserts, dimension, max_vectors=MAX_BATCH_VECTORS, max_bytes=MAX_BATCH_BYTES):
+    """Split upserts so each request stays under max_vectors and (approximately) max_bytes of JSON."""
+    per_vector = dimension * 20 + 64  # ~20 bytes per JSON float plus framing
+    batch, size = [], 0
+    for vid, row in upserts:
+        cost = per_vector + len(vid.encode("utf-8"))
+        if batch and (len(batch) >= max_vectors or size + cost > max_bytes):
+            yield batch
+            batch, size = [], 0
+        batch.append((vid, row))
+        size += cost
+    if batch:
+        yield batch
+
+def sync(index, embeddings, ids, synced, workers=4, max_vectors=MAX_BATCH_VECTORS, max_bytes=MAX_BATCH_BYTES,
+         dry_run=False, namespace=""):
+    """Bring namespace of index in line with (embeddings, ids); returns (hashes now there, failed batch count).
+
+    synced maps id -> hash for what the index is known to hold. Only batches that
+    succeed are recorded, so a failed sync is simply resumed by the next run.
+    """
+    upserts, deletes, current = plan_sync(embeddings, ids, synced)
+    print(f"{len(current)} vectors: {len(upserts)} to upload, {len(deletes)} to delete, "
+          f"{len(current) - len(upserts)} unchanged")
+    if dry_run:
+        return synced, 0
+    synced = dict(synced)
+    failed = done = 0
+
+    def send(batch):
+        index.upsert(vectors=[(vid, np.asarray(embeddings[row], dtype=np.float32).tolist()) for vid, row in batch],
+                     namespace=namespace)
+        return batch
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(send, batch)
+                   for batch in upsert_batches(upserts, embeddings.shape[1], max_vectors, max_bytes)]
+        for future in as_completed(futures):
+            try:
+                batch = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"[!] Upsert batch failed: {e}")
+                continue
+            for vid, _ in batch:
+                synced[vid] = current[vid]
+            done += len(batch)
+            print(f"Uploaded {done}/{len(upserts)} vectors")
+    deleted, delete_failures = delete_vectors(index, deletes, namespace)
+    for vid in deleted:
+        synced.pop(vid, None)
+    return synced, failed + delete_failures
+
+def delete_vectors(index, ids, namespace=""):
+    """Delete ids in batches; returns (ids deleted, failed batch count)."""
+    deleted, failed = [], 0
+    for start in range(0, len(ids), MAX_DELETE_IDS):
+        batch = ids[start:start + MAX_DELETE_IDS]
+        try:
+            index.delete(ids=batch, namespace=namespace)
+        except Exception as e:
+            failed += 1
+            print(f"[!] Delete batch failed: {e}")
+            continue
+        deleted.extend(batch)
+        print(f"Deleted {len(deleted)}/{len(ids)} vectors")
+    return deleted, failed
+
+def pinecone_index(dimension, create=True):
+    """Open (creating if needed) the Pinecone index named by VECTOR_DB_URL; returns (index, name) or None.
+
+    With create=False a missing index is not created and comes back as (None, name).
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+    api_key = os.getenv("VECTOR_DB_API_KEY")
+    url = os.getenv("VECTOR_DB_URL")
+    if not (api_key and url):
+        print("Pinecone credentials not found in .env. Skipping upload.")
+        return None
     # Example: https://steve-agi-6lw2m2o.svc.aped-4627-b74a.pinecone.io
     m = re.match(r"https://([^.]+)\.svc\.([^.]+)\.pinecone\.io", url)
-    if m:
-        subdomain = m.group(1)
-        environment = m.group(2)
-        # The index name is the first two segments joined by a dash (e.g., steve-agi)
-        parts = subdomain.split('-')
-        index_name = '-'.join(parts[:2])
-
-        from pinecone import Pinecone, ServerlessSpec
-        pc = Pinecone(api_key=api_key)
-
-        # Check if index exists, create if not
-        if index_name not in [idx.name for idx in pc.list_indexes()]:
-            print(f"Index '{index_name}' not found. Creating it...")
-            pc.create_index(
-                name=index_name,
-                dimension=embeddings.shape[1],
-                metric="cosine",
-                spec=ServerlessSpec(cloud="aws", region="us-east-1")
-            )
-            # Wait for index to be ready
-            import time
-            while True:
-                idxs = [idx.name for idx in pc.list_indexes()]
-                if index_name in idxs:
-                    break
-                print("Waiting for index to be ready...")
-                time.sleep(2)
-
-        index = pc.Index(index_name)
-
-        # Load filenames
-        with open("bot_core/knowledge/doc_filenames.txt", encoding="utf-8") as f:
-            filenames = [line.strip() for line in f]
-
-        # Upsert embeddings
-        vectors = [(fname, vec.tolist()) for fname, vec in zip(filenames, embeddings)]
-        index.upsert(vectors)
-        print(f"Uploaded {len(vectors)} vectors to Pinecone index '{index_name}' in environment '{environment}'.")
-    else:
+    if not m:
         print("Could not parse Pinecone index name and environment from VECTOR_DB_URL.")
-else:
-    print("Pinecone credentials not found in .env. Skipping upload.")
+        return None
+    # The index name is the first two segments joined by a dash (e.g., steve-agi)
+    index_name = '-'.join(m.group(1).split('-')[:2])
+
+    from pinecone import Pinecone, ServerlessSpec
+    pc = Pinecone(api_key=api_key)
+    if index_name not in [idx.name for idx in pc.list_indexes()]:
+        if not create:
+            print(f"Index '{index_name}' not found; it would be created.")
+            return None, index_name
+        print(f"Index '{index_name}' not found. Creating it...")
+        # create_index blocks until the index is ready
+        pc.create_index(
+            name=index_name,
+            dimension=dimension,
+            metric="cosine",
+            spec=ServerlessSpec(cloud="aws", region="us-east-1")
+        )
+    return pc.Index(index_name), index_name
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect embeddings and sync them to Pinecone.")
+    parser.add_argument("--passages", action="store_true", help="Sync passage embeddings instead of documents")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent upsert requests")
+    parser.add_argument("--batch-size", type=int, default=MAX_BATCH_VECTORS, help="Max vectors per upsert")
+    parser.add_argument("--full", action="store_true", help="Ignore the last sync and re-upload everything")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be uploaded/deleted")
+    args = parser.parse_args(argv)
+
+    embeddings_path, ids_path = ((PASSAGE_EMBEDDINGS_PATH, PASSAGE_IDS_PATH) if args.passages
+                                 else (EMBEDDINGS_PATH, FILENAMES_PATH))
+    # Passages get their own namespace so document queries never return passage ids
+    namespace = PASSAGE_NAMESPACE if args.passages else ""
+    embeddings, ids = load_vectors(embeddings_path, ids_path)
+    print(f"Embeddings shape: {embeddings.shape}")
+
+    # A dry run only reads the sync state, so it never creates the index
+    target = pinecone_index(embeddings.shape[1], create=not args.dry_run)
+    if target is None:
+        return
+    index, index_name = target
+    state_path = sync_state_path(embeddings_path)
+    synced_namespace, synced = load_sync_state(state_path, index_name)
+    if synced and synced_namespace != namespace:
+        # Synced to another namespace before (passages used to share the default one): move them
+        print(f"Removing {len(synced)} vectors from namespace '{synced_namespace}'")
+        if not args.dry_run:
+            deleted, _ = delete_vectors(index, list(synced), synced_namespace)
+            if len(deleted) < len(synced):
+                print("[!] Could not clear the old namespace; rerun to retry.")
+                return
+        synced = {}
+    if args.full:
+        # Forget the hashes but keep the ids, so removed documents are still deleted
+        synced = dict.fromkeys(synced)
+    synced, failed = sync(index, embeddings, ids, synced, workers=args.workers, max_vectors=args.batch_size,
+                          dry_run=args.dry_run, namespace=namespace)
+    if not args.dry_run:
+        save_sync_state(state_path, index_name, synced, namespace)
+        where = f"namespace '{namespace}' of " if namespace else ""
+        print(f"Synced {len(synced)} vectors to {where}Pinecone index '{index_name}'"
+              + (f" ({failed} batches failed; rerun to retry)" if failed else "."))
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,15 @@
 Expert Knowledgebase Downloader for AGI/Robotics/AI
 - Downloads the best knowledge sources (papers, code, tutorials, docs) for a given topic list.
 - Saves all files in 'knowledge/docs/'.
+- Downloads run concurrently through bot_core.fetcher (pooled session, retries,
+  per-host limits) and unchanged sources are skipped via ETag/Last-Modified.
 - Supports: arXiv, GitHub (README, docs, examples), official docs, high-quality blogs, and Wikipedia as fallback.
 """
+import argparse
 import os
-import requests
-import trafilatura
-import wikipediaapi
+import re
+from functools import partial
+from bot_core.fetcher import Fetcher, USER_AGENT, report, write_atomic
 
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "knowledge", "docs")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -29,6 +32,9 @@ TOPICS = [
     "Joke"
 ]
 
+ARXIV_PDF_URL = "https://arxiv.org/pdf/{id}.pdf"
+GITHUB_RAW_URL = "https://raw.githubusercontent.com/{repo}/master/{file}"
+
 # Example mappings for key sources (expand as needed)
 ARXIV_PAPERS = {
     "Reinforcement learning": ["1802.01569", "1606.01540", "1709.06560"],  # Add more survey/review papers
@@ -64,94 +70,85 @@ OFFICIAL_DOCS = {
     ]
 }
 
-def download_arxiv(arxiv_id, title):
-    import re
-    url = f"https://arxiv.org/pdf/{arxiv_id}.pdf"
-    safe_title = re.sub(r'[^\w\-_\. ]', '_', title)
-    filename = os.path.join(OUTPUT_DIR, f"arxiv_{arxiv_id}_{safe_title.replace(' ', '_')}.pdf")
-    r = requests.get(url)
-    if r.status_code == 200 and r.headers.get('Content-Type', '').startswith('application/pdf'):
-        with open(filename, "wb") as f:
-            f.write(r.content)
-        print(f"[+] Saved arXiv paper: {filename}")
-    else:
-        print(f"[!] Failed to download arXiv paper: {arxiv_id} (status: {r.status_code}, url: {url})")
+def _safe(name):
+    # Sanitize for Windows filenames
+    return re.sub(r'[^\w\-_\. ]', '_', name).replace(' ', '_')
+
+def _extract_text(html):
+    import trafilatura
+    return trafilatura.extract(html)
 
-def download_github(repo, files, topic):
-    import re
-    safe_topic = re.sub(r'[^\w\-_\. ]', '_', topic)
-    for file in files:
-        url = f"https://raw.githubusercontent.com/{repo}/master/{file}"
-        safe_file = file.replace('/', '_')
-        filename = os.path.join(OUTPUT_DIR, f"github_{repo.replace('/', '_')}_{safe_topic.replace(' ', '_')}_{safe_file}")
-        r = requests.get(url)
-        if r.status_code == 200:
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(r.text)
-            print(f"[+] Saved GitHub file: {filename}")
-        else:
-            print(f"[!] Failed to download GitHub file: {repo}/{file}")
+def download_arxiv(fetcher, arxiv_id, title):
+    url = ARXIV_PDF_URL.format(id=arxiv_id)
+    filename = os.path.join(OUTPUT_DIR, f"arxiv_{arxiv_id}_{_safe(title)}.pdf")
+    def is_pdf(r):
+        return r.headers.get('Content-Type', '').startswith('application/pdf')
+    return report(fetcher.fetch(url, filename, accept=is_pdf), "arXiv paper", arxiv_id)
 
-def download_web(url, title):
-    import re
-    downloaded = trafilatura.fetch_url(url)
-    if downloaded:
-        text = trafilatura.extract(downloaded)
-        # Sanitize title for Windows filenames
-        safe_title = re.sub(r'[^\w\-_\. ]', '_', title)
-        filename = os.path.join(OUTPUT_DIR, f"web_{safe_title.replace(' ', '_')}.txt")
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write(text)
-        print(f"[+] Saved web article: {filename}")
-    else:
-        print(f"[!] Failed to download web article: {url}")
+def download_github(fetcher, repo, file, topic):
+    url = GITHUB_RAW_URL.format(repo=repo, file=file)
+    safe_file = file.replace('/', '_')
+    filename = os.path.join(OUTPUT_DIR, f"github_{repo.replace('/', '_')}_{_safe(topic)}_{safe_file}")
+    return report(fetcher.fetch(url, filename), "GitHub file", f"{repo}/{file}")
 
-def download_official_docs(url, title):
+def download_web(fetcher, url, title):
+    filename = os.path.join(OUTPUT_DIR, f"web_{_safe(title)}.txt")
+    return report(fetcher.fetch(url, filename, _extract_text), "web article", url)
+
+def download_official_docs(fetcher, url, title):
     # Download the main page as text
-    import re
-    downloaded = trafilatura.fetch_url(url)
-    if downloaded:
-        text = trafilatura.extract(downloaded)
-        # Sanitize title for Windows filenames
-        safe_title = re.sub(r'[^\w\-_\. ]', '_', title)
-        filename = os.path.join(OUTPUT_DIR, f"docs_{safe_title.replace(' ', '_')}.txt")
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write(text)
-        print(f"[+] Saved official docs: {filename}")
-    else:
-        print(f"[!] Failed to download official docs: {url}")
+    filename = os.path.join(OUTPUT_DIR, f"docs_{_safe(title)}.txt")
+    return report(fetcher.fetch(url, filename, _extract_text), "official docs", url)
 
-def download_wikipedia(title):
-    import re
-    USER_AGENT = "ThinkBotAGI/1.0 (sagar200422@gmail.com)"
+def download_wikipedia(fetcher, title, refresh=False):
+    # wikipediaapi manages its own requests (no validators); it still counts against the per-host limit
+    filename = os.path.join(OUTPUT_DIR, f"wiki_{_safe(title)}.txt")
+    if os.path.exists(filename) and not refresh:
+        print(f"[=] Already have Wikipedia article: {filename}")
+        return filename
+    import wikipediaapi
     wiki = wikipediaapi.Wikipedia(user_agent=USER_AGENT, language='en')
-    page = wiki.page(title)
-    if not page.exists():
-        print(f"[!] Wikipedia article not found: {title}")
-        return
-    # Sanitize title for Windows filenames
-    safe_title = re.sub(r'[^\w\-_\. ]', '_', title)
-    filename = os.path.join(OUTPUT_DIR, f"wiki_{safe_title.replace(' ', '_')}.txt")
-    with open(filename, "w", encoding="utf-8") as f:
-        f.write(page.text)
+    with fetcher.host_slot("https://en.wikipedia.org/"):
+        page = wiki.page(title)
+        if not page.exists():
+            print(f"[!] Wikipedia article not found: {title}")
+            return None
+        text = page.text
+    write_atomic(filename, [text.encode("utf-8")])
     print(f"[+] Saved Wikipedia article: {filename}")
+    return filename
 
-def main():
-    for topic in TOPICS:
+def build_jobs(fetcher, topics=TOPICS, refresh=False):
+    jobs = []
+    for topic in topics:
         # Download arXiv papers
         for arxiv_id in ARXIV_PAPERS.get(topic, []):
-            download_arxiv(arxiv_id, topic)
+            jobs.append(partial(download_arxiv, fetcher, arxiv_id, topic))
         # Download GitHub repos (README, docs, examples)
         for repo_info in GITHUB_REPOS.get(topic, []):
-            download_github(repo_info["repo"], repo_info["files"], topic)
+            for file in repo_info["files"]:
+                jobs.append(partial(download_github, fetcher, repo_info["repo"], file, topic))
         # Download tutorials/blogs
         for url, title in TUTORIALS.get(topic, []):
-            download_web(url, title)
+            jobs.append(partial(download_web, fetcher, url, title))
         # Download official docs
         for url, title in OFFICIAL_DOCS.get(topic, []):
-            download_official_docs(url, title)
+            jobs.append(partial(download_official_docs, fetcher, url, title))
         # Always fallback to Wikipedia
-        download_wikipedia(topic)
+        jobs.append(partial(download_wikipedia, fetcher, topic, refresh))
+    return jobs
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download knowledge sources into knowledge/docs/.")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent downloads")
+    parser.add_argument("--per-host", type=int, default=2, help="Concurrent downloads per host")
+    parser.add_argument("--refresh", action="store_true", help="Re-fetch Wikipedia articles that are already saved")
+    args = parser.parse_args(argv)
+    fetcher = Fetcher(max_workers=args.workers, per_host=args.per_host)
+    try:
+        fetcher.run(build_jobs(fetcher, refresh=args.refresh))
+    finally:
+        fetcher.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,291 @@
+"""
+Local vector index over the knowledge base embeddings.
+- exact: brute-force cosine over a normalized, memory-mapped float32 matrix
+- ivf: inverted-file approximate search (spherical k-means lists, probe nprobe of them)
+- precision: f32, or int8 codes (per-vector scale) of the vectors minus their mean, ~4x
+  smaller and scanned without a float32 copy. With rerank > 0 the top rerank*k candidates
+  are re-scored against a float32 copy, which is then kept on disk as well.
+  Run `python -m bot_core.knowledge_index --recall` to see what recall a corpus gets.
+query() returns the same {"matches": [{"id", "score"}]} shape as a Pinecone index,
+so callers can switch between the two.
+"""
+import argparse
+import os
+import time
+import numpy as np
+
+KNOWLEDGE_DIR = os.path.join(os.path.dirname(__file__), "knowledge")
+EMBEDDINGS_PATH = os.path.join(KNOWLEDGE_DIR, "doc_embeddings.npy")
+FILENAMES_PATH = os.path.join(KNOWLEDGE_DIR, "doc_filenames.txt")
+PRECISIONS = ("f32", "int8")
+SCAN_ROWS = 512  # rows decoded per block by _scan; small enough to stay in cache
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+def _is_stale(path, *sources):
+    return not os.path.exists(path) or any(os.path.getmtime(path) < os.path.getmtime(s) for s in sources)
+
+def _top_k(scores, top_k):
+    top_k = min(top_k, int(np.isfinite(scores).sum()))
+    if top_k <= 0:
+        return np.empty(0, dtype=np.int64)
+    idx = np.argpartition(-scores, top_k - 1)[:top_k]
+    return idx[np.argsort(-scores[idx])]
+
+def quantize(vectors, precision):
+    """Compact codes for normalized vectors: (codes, scales, offset).
+
+    Codes store v - offset, offset being the mean vector. It is the same for every
+    row (q . offset is added back when scoring), so removing it spends the int8
+    range on what tells rows apart; Word2Vec mean vectors share a large common
+    component. Rows are stored as round(r / s) with their own s = max|r| / 127.
+    """
+    if precision == "f32":
+        return vectors, None, None
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision}")
+    vectors = np.asarray(vectors, dtype=np.float32)
+    offset = vectors.mean(axis=0) if len(vectors) else np.zeros(vectors.shape[1], dtype=np.float32)
+    residuals = vectors - offset
+    scales = np.abs(residuals).max(axis=1) / 127
+    scales[scales == 0] = 1
+    return np.round(residuals / scales[:, None]).astype(np.int8), scales.astype(np.float32), offset
+
+def save_atomic(path, save):
+    """Call save(f) on a binary file next to path, then rename it over path.
+
+    Readers never see a half-written file, and ones that memory-mapped the old
+    file keep a valid copy.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        save(f)
+    os.replace(tmp_path, path)
+
+def _scan(codes, queries):
+    """queries @ codes.T in float32, decoding SCAN_ROWS code rows at a time into a reused buffer.
+
+    Casting a cache-sized block and multiplying it beats both numpy's integer matmul
+    (no BLAS) and decoding everything up front (as much memory traffic as float32).
+    """
+    scores = np.empty((len(queries), len(codes)), dtype=np.float32)
+    block = np.empty((min(SCAN_ROWS, len(codes)), codes.shape[1]), dtype=np.float32)
+    for start in range(0, len(codes), SCAN_ROWS):
+        rows = codes[start:start + SCAN_ROWS]
+        decoded = block[:len(rows)]
+        decoded[...] = rows
+        np.matmul(queries, decoded.T, out=scores[:, start:start + len(rows)])
+    return scores
+
+class KnowledgeIndex:
+    """Cosine-similarity index over document embeddings, usable offline."""
+    def __init__(self, embeddings, ids, mode="exact", nlist=None, nprobe=8, ivf_path=None, precision="f32",
+                 rerank=0, codes=None, scales=None, offset=None):
+        if embeddings is None and (codes is None or rerank):
+            raise ValueError("The float32 embeddings are needed unless int8 codes are given without rerank.")
+        rows = len(codes if embeddings is None else embeddings)
+        if rows != len(ids):
+            raise ValueError(f"Got {rows} embeddings for {len(ids)} ids.")
+        if mode not in ("exact", "ivf"):
+            raise ValueError(f"Unknown index mode: {mode}")
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision: {precision}")
+        # A memmap (see load) is already normalized and is used as-is, without a copy
+        self.vectors = (embeddings if embeddings is None or isinstance(embeddings, np.memmap)
+                        else normalize(embeddings))
+        self.ids = list(ids)
+        # Blank ids are tombstoned rows (deleted documents, see embed_knowledge)
+        self.tombstones = np.array([not doc_id for doc_id in self.ids], dtype=bool)
+        if not self.tombstones.any():
+            self.tombstones = None
+        self.mode = mode
+        self.nprobe = nprobe
+        self.precision = precision
+        self.rerank = rerank
+        if codes is None:
+            codes, scales, offset = quantize(self.vectors, precision)
+        self.codes, self.scales, self.offset = codes, scales, offset
+        if mode == "ivf":
+            if ivf_path and os.path.exists(ivf_path):
+                data = np.load(ivf_path)
+                self.centroids, assignments = data["centroids"], data["assignments"]
+            else:
+                self.centroids, assignments = self._train_ivf(nlist or max(1, int(np.sqrt(len(self.ids)))))
+                if ivf_path:
+                    save_atomic(ivf_path, lambda f: np.savez(f, centroids=self.centroids, assignments=assignments))
+            order = np.argsort(assignments, kind="stable")
+            bounds = np.searchsorted(assignments[order], np.arange(len(self.centroids) + 1))
+            self.lists = [order[bounds[c]:bounds[c + 1]] for c in range(len(self.centroids))]
+
+    @classmethod
+    def load(cls, embeddings_path=EMBEDDINGS_PATH, filenames_path=FILENAMES_PATH, mode="exact", precision="f32",
+             rerank=0, **kwargs):
+        """Load doc_embeddings.npy, caching what gets scanned next to it for mmap.
+
+        That is a normalized float32 copy, or the int8 codes; the float32 copy is only
+        built alongside the codes when rerank > 0 needs it.
+        """
+        with open(filenames_path, encoding="utf-8") as f:
+            ids = [line.strip() for line in f]
+        base = os.path.splitext(embeddings_path)[0]
+        normalized = None
+        vectors = None
+        if precision == "f32" or rerank:
+            normalized_path = base + ".normalized.f32.npy"
+            if _is_stale(normalized_path, embeddings_path):
+                normalized = normalize(np.load(embeddings_path))
+                save_atomic(normalized_path, lambda f: np.save(f, normalized))
+            vectors = np.load(normalized_path, mmap_mode="r")
+        if precision != "f32":
+            codes_path = f"{base}.normalized.{precision}.npy"
+            meta_path = f"{base}.normalized.{precision}.meta.npz"  # offset and scales
+            if _is_stale(codes_path, embeddings_path) or _is_stale(meta_path, embeddings_path):
+                if normalized is None:
+                    normalized = normalize(np.load(embeddings_path))
+                codes, scales, offset = quantize(normalized, precision)
+                save_atomic(meta_path, lambda f: np.savez(f, offset=offset, scales=scales))
+                save_atomic(codes_path, lambda f: np.save(f, codes))
+            with np.load(meta_path) as meta:
+                kwargs["offset"], kwargs["scales"] = meta["offset"], meta["scales"]
+            kwargs["codes"] = np.load(codes_path, mmap_mode="r")
+        if mode == "ivf":
+            ivf_path = base + ".ivf.npz"
+            if os.path.exists(ivf_path) and _is_stale(ivf_path, embeddings_path):
+                os.remove(ivf_path)
+            kwargs.setdefault("ivf_path", ivf_path)
+        return cls(vectors, ids, mode=mode, precision=precision, rerank=rerank, **kwargs)
+
+    def _train_ivf(self, nlist, iterations=10, seed=0):
+        # Spherical k-means: centroids are re-normalized means of their members
+        rng = np.random.default_rng(seed)
+        if self.vectors is None:
+            # Only the int8 codes are kept: train on their decoded values
+            vectors = normalize(self.codes * self.scales[:, None] + self.offset)
+        else:
+            vectors = np.asarray(self.vectors)
+        nlist = min(nlist, len(vectors))
+        centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = (vectors @ centroids.T).argmax(1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, vectors)
+            empty = np.bincount(assignments, minlength=nlist) == 0
+            sums[empty] = centroids[empty]
+            centroids = normalize(sums)
+        return centroids, (vectors @ centroids.T).argmax(1)
+
+    def _scores(self, queries, rows=None):
+        """Scores of normalized queries against all rows (or the given ones), from the compact codes."""
+        codes = self.codes if rows is None else self.codes[rows]
+        if self.precision == "f32":
+            return queries @ np.asarray(codes).T
+        scores = _scan(codes, queries)
+        scores *= self.scales if rows is None else self.scales[rows]
+        scores += (queries @ self.offset)[:, None]
+        return scores
+
+    def _best(self, scores, q, top_k, candidates=None):
+        """Top-k (row, score); quantized scores are re-ranked in float32 over rerank * top_k candidates."""
+        if self.precision == "f32" or not self.rerank:
+            best = _top_k(scores, top_k)
+            rows = best if candidates is None else candidates[best]
+            return [(self.ids[r], float(scores[b])) for r, b in zip(rows, best)]
+        shortlist = _top_k(scores, top_k * self.rerank)
+        rows = np.sort(shortlist if candidates is None else candidates[shortlist])
+        exact = self.vectors[rows] @ q
+        best = _top_k(exact, top_k)
+        return [(self.ids[rows[b]], float(exact[b])) for b in best]
+
+    def search(self, vector, top_k=3):
+        """Return [(id, score)] for the top_k most similar documents."""
+        q = normalize(vector)
+        if self.mode == "exact":
+            candidates = None
+            scores = self._scores(q[None])[0]
+            if self.tombstones is not None:
+                scores[self.tombstones] = -np.inf
+        else:
+            probe = _top_k(self.centroids @ q, self.nprobe)
+            # Sorted rows keep memmap reads sequential
+            candidates = np.sort(np.concatenate([self.lists[c] for c in probe]))
+            if self.tombstones is not None:
+                candidates = candidates[~self.tombstones[candidates]]
+            scores = self._scores(q[None], candidates)[0]
+        return self._best(scores, q, top_k, candidates)
+
+    def search_batch(self, vectors, top_k=3):
+        """search() for a batch of query vectors; exact mode scores them in one matrix product."""
+        vectors = np.atleast_2d(vectors)
+        if self.mode != "exact":
+            return [self.search(v, top_k) for v in vectors]
+        queries = normalize(vectors)
+        scores = self._scores(queries)
+        if self.tombstones is not None:
+            scores[:, self.tombstones] = -np.inf
+        return [self._best(row, q, top_k) for row, q in zip(scores, queries)]
+
+    def query(self, vector, top_k=3, include_metadata=False, namespace=""):
+        # Same call and result shape as pinecone.Index.query
+        return {"matches": [{"id": doc_id, "score": score} for doc_id, score in self.search(vector, top_k)]}
+
+    def __len__(self):
+        return len(self.ids) - (0 if self.tombstones is None else int(self.tombstones.sum()))
+
+def recall_report(embeddings, ids, k=10, num_queries=200, rerank=4, noise=0.05, seed=0):
+    """Compare int8 against exact float32 search: disk size, recall@k (without/with re-ranking), latency.
+
+    Queries are stored vectors plus Gaussian noise, so each has a meaningful neighbourhood.
+    """
+    rng = np.random.default_rng(seed)
+    vectors = normalize(embeddings)
+    live = np.flatnonzero([bool(doc_id) for doc_id in ids])
+    queries = vectors[rng.choice(live, min(num_queries, len(live)), replace=False)]
+    queries = normalize(queries + rng.normal(scale=noise, size=queries.shape).astype(np.float32) / np.sqrt(vectors.shape[1]))
+    truth = [{doc_id for doc_id, _ in hits} for hits in KnowledgeIndex(vectors, ids).search_batch(queries, k)]
+    print(f"{len(live)} vectors x {vectors.shape[1]} dims, {len(queries)} queries, recall@{k} vs exact float32")
+    # disk MB is what load() keeps next to doc_embeddings.npy for that configuration
+    print(f"{'precision':<10}{'rerank':>8}{'bytes/vec':>10}{'disk MB':>10}{'recall':>10}{'ms/query':>10}")
+    codes, scales, offset = quantize(vectors, "int8")
+    int8_bytes = codes.nbytes + scales.nbytes + offset.nbytes
+    configs = [("f32", 0, vectors.nbytes), ("int8", 0, int8_bytes), ("int8", rerank, int8_bytes + vectors.nbytes)]
+    for precision, r, size in configs:
+        if precision == "f32":
+            index = KnowledgeIndex(vectors, ids)
+        else:
+            index = KnowledgeIndex(vectors if r else None, ids, precision=precision, rerank=r, codes=codes,
+                                   scales=scales, offset=offset)
+        start = time.perf_counter()
+        results = [index.search(q, k) for q in queries]
+        elapsed = (time.perf_counter() - start) / len(queries) * 1000
+        recall = np.mean([len(truth[i] & {doc_id for doc_id, _ in hits}) / max(1, len(truth[i]))
+                          for i, hits in enumerate(results)])
+        print(f"{precision:<10}{r or '-':>8}{size / len(vectors):>10.0f}{size / 2**20:>10.1f}"
+              f"{recall:>10.3f}{elapsed:>10.2f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect the local knowledge index.")
+    parser.add_argument("--recall", action="store_true", help="Report recall and size of the int8 format")
+    parser.add_argument("--passages", action="store_true", help="Use the passage-level embeddings")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--rerank", type=int, default=4, help="Candidates re-scored in float32, as a multiple of k")
+    args = parser.parse_args(argv)
+
+    embeddings_path, ids_path = EMBEDDINGS_PATH, FILENAMES_PATH
+    if args.passages:
+        from bot_core.passages import PASSAGE_EMBEDDINGS_PATH, PASSAGE_IDS_PATH
+        embeddings_path, ids_path = PASSAGE_EMBEDDINGS_PATH, PASSAGE_IDS_PATH
+    with open(ids_path, encoding="utf-8") as f:
+        ids = [line.strip() for line in f]
+    embeddings = np.load(embeddings_path, mmap_mode="r")
+    if args.recall:
+        recall_report(embeddings, ids, args.k, args.queries, args.rerank)
+    else:
+        print(f"{len(ids)} rows x {embeddings.shape[1]} dims ({embeddings.dtype}), "
+              f"{len(ids) - ids.count('')} live")
+
+if __name__ == "__main__":
+    main()
@@ -2,34 +2,214 @@
 Memory module for AGI bot core.
 Implements ShortTermMemory, LongTermMemory, and EpisodicMemory classes.
 """
+import heapq
+import json
+import math
+import os
+import re
+import time
+from collections import Counter, defaultdict, deque
+from itertools import islice
+
+_TOKEN_RE = re.compile(r"\w+")
 
 class ShortTermMemory:
-    """Stores recent events, observations, and chat context."""
+    """Stores recent events, observations, and chat context.
+
+    A fixed-size ring buffer: add is O(1) and evicts the oldest item once full.
+    Iterate (or use recent(n)) to read without copying the whole buffer.
+    """
     def __init__(self, capacity=20):
         self.capacity = capacity
-        self.buffer = []
+        self.buffer = deque(maxlen=capacity)
     def add(self, item):
         self.buffer.append(item)
-        if len(self.buffer) > self.capacity:
-            self.buffer.pop(0)
     def get(self):
         return list(self.buffer)
+    def recent(self, n):
+        """The newest n items, oldest first."""
+        return list(islice(reversed(self.buffer), n))[::-1]
+    def __iter__(self):
+        return iter(self.buffer)
+    def __len__(self):
+        return len(self.buffer)
 
 class LongTermMemory:
-    """Stores facts, skills, and knowledge (can be backed by a DB or file)."""
-    def __init__(self):
+    """Stores facts, skills, and knowledge (can be backed by a DB or file).
+
+    Facts are indexed on add: an inverted index of lowercase tokens for BM25
+    ranking, the cached lowercase text for substring matching and, if an
+    embedder (text -> vector, e.g. KnowledgeSearcher.embed_query) is given,
+    a vector for cosine similarity.
+    """
+    def __init__(self, embedder=None, k1=1.5, b=0.75):
         self.knowledge = []
+        self.embedder = embedder
+        self.k1 = k1
+        self.b = b
+        self._lowered = []
+        self._postings = defaultdict(dict)  # term -> {fact index: term frequency}
+        self._lengths = []
+        self._total_length = 0
+        self._vectors = None
     def add(self, fact):
+        i = len(self.knowledge)
         self.knowledge.append(fact)
-    def search(self, query):
-        # Placeholder: implement vector search or keyword search
-        return [k for k in self.knowledge if query.lower() in str(k).lower()]
+        text = str(fact).lower()
+        self._lowered.append(text)
+        tokens = _TOKEN_RE.findall(text)
+        for term, tf in Counter(tokens).items():
+            self._postings[term][i] = tf
+        self._lengths.append(len(tokens))
+        self._total_length += len(tokens)
+        if self.embedder is not None:
+            self._add_vector(i, self.embedder(str(fact)))
+    def _add_vector(self, i, vector):
+        import numpy as np
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if self._vectors is None:
+            self._vectors = np.zeros((64, len(vector)), dtype=np.float32)
+        elif i >= len(self._vectors):
+            # Grow by doubling so adds stay amortized O(1)
+            grown = np.zeros((2 * len(self._vectors), self._vectors.shape[1]), dtype=np.float32)
+            grown[:len(self._vectors)] = self._vectors
+            self._vectors = grown
+        self._vectors[i] = vector / norm if norm else vector
+    def search(self, query, top_k=None, mode="bm25"):
+        """Facts matching query, best first. mode is "bm25", "vector" or "substring"."""
+        if mode == "substring":
+            q = query.lower()
+            return [k for k, text in zip(self.knowledge, self._lowered) if q in text]
+        if mode == "vector":
+            return [self.knowledge[i] for i, _ in self._vector_scores(query, top_k)]
+        if mode != "bm25":
+            raise ValueError(f"Unknown search mode: {mode}")
+        return [self.knowledge[i] for i, _ in self._bm25_scores(query, top_k)]
+    def _bm25_scores(self, query, top_k):
+        n = len(self.knowledge)
+        if n == 0:
+            return []
+        avg_length = self._total_length / n or 1
+        scores = defaultdict(float)
+        for term in set(_TOKEN_RE.findall(query.lower())):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for i, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[i] / avg_length)
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+        if top_k is None:
+            return sorted(scores.items(), key=lambda item: -item[1])
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+    def _vector_scores(self, query, top_k):
+        import numpy as np
+        if self.embedder is None:
+            raise ValueError("Vector search needs an embedder.")
+        n = len(self.knowledge)
+        if n == 0:
+            return []
+        q = np.asarray(self.embedder(query), dtype=np.float32)
+        norm = np.linalg.norm(q)
+        scores = self._vectors[:n] @ (q / norm if norm else q)
+        k = n if top_k is None else min(top_k, n)
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(int(i), float(scores[i])) for i in best]
 
 class EpisodicMemory:
-    """Stores sequences of events/episodes with timestamps."""
-    def __init__(self):
-        self.episodes = []
-    def add(self, episode):
-        self.episodes.append(episode)
+    """Stores sequences of events/episodes with timestamps.
+
+    Without a directory everything stays in RAM. With one, episodes are
+    appended to JSONL segment files of segment_size episodes, only the newest
+    cache_size are kept in memory, and a per-segment [start, end] time index
+    (index.json) lets get_recent and get_range read just the segments they need.
+    """
+    def __init__(self, directory=None, segment_size=1000, cache_size=1000):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.segments = []  # [{"file", "start", "end", "count"}], oldest first
+        self._file = None
+        if directory is None:
+            self._recent = deque()
+            return
+        self._recent = deque(maxlen=cache_size)
+        os.makedirs(directory, exist_ok=True)
+        index_path = os.path.join(directory, "index.json")
+        if os.path.exists(index_path):
+            with open(index_path, encoding="utf-8") as f:
+                self.segments = json.load(f)["segments"]
+        if self.segments:
+            # The open segment may have grown after the index was last written
+            last = self.segments[-1]
+            records = self._read_segment(last)
+            if records:
+                last.update(count=len(records), start=min(r["t"] for r in records),
+                            end=max(r["t"] for r in records))
+            if len(records) < cache_size and len(self.segments) > 1:
+                records = self._read_segment(self.segments[-2]) + records
+            self._recent.extend((r["t"], r["episode"]) for r in records)
+    def add(self, episode, timestamp=None):
+        t = time.time() if timestamp is None else timestamp
+        self._recent.append((t, episode))
+        if self.directory is None:
+            return
+        if not self.segments or self.segments[-1]["count"] >= self.segment_size:
+            self._roll_segment(t)
+        segment = self.segments[-1]
+        if self._file is None:
+            self._file = open(os.path.join(self.directory, segment["file"]), "a", encoding="utf-8")
+        self._file.write(json.dumps({"t": t, "episode": episode}, ensure_ascii=False) + "\n")
+        self._file.flush()
+        segment["count"] += 1
+        segment["start"] = min(segment["start"], t)
+        segment["end"] = max(segment["end"], t)
+    def _roll_segment(self, t):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        name = f"episodes_{len(self.segments):06d}.jsonl"
+        self.segments.append({"file": name, "start": t, "end": t, "count": 0})
+        self._write_index()
+    def _write_index(self):
+        index_path = os.path.join(self.directory, "index.json")
+        with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"segments": self.segments}, f)
+        os.replace(index_path + ".tmp", index_path)
+    def _read_segment(self, segment):
+        path = os.path.join(self.directory, segment["file"])
+        if not os.path.exists(path):
+            return []
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.endswith("\n")]
     def get_recent(self, n=5):
-        return self.episodes[-n:] if len(self.episodes) >= n else self.episodes
+        if n <= len(self._recent) or self.directory is None:
+            return [episode for _, episode in islice(self._recent, max(0, len(self._recent) - n), None)]
+        episodes = []
+        for segment in reversed(self.segments):
+            episodes[:0] = [r["episode"] for r in self._read_segment(segment)]
+            if len(episodes) >= n:
+                break
+        return episodes[-n:]
+    def get_range(self, start=None, end=None):
+        """Episodes with start <= timestamp <= end (either bound may be None), oldest first."""
+        lo = float("-inf") if start is None else start
+        hi = float("inf") if end is None else end
+        if self.directory is None:
+            return [episode for t, episode in self._recent if lo <= t <= hi]
+        episodes = []
+        for segment in self.segments:
+            if segment["count"] and segment["end"] >= lo and segment["start"] <= hi:
+                episodes.extend(r["episode"] for r in self._read_segment(segment) if lo <= r["t"] <= hi)
+        return episodes
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.directory is not None and self.segments:
+            self._write_index()
+    def __len__(self):
+        if self.directory is None:
+            return len(self._recent)
+        return sum(segment["count"] for segment in self.segments)
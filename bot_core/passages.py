@@ -0,0 +1,88 @@
+"""
+Passage-level chunking for the knowledge base.
+- Splits each document into overlapping windows of words
+- Records the byte range of every passage in its source file
+- Passage ids ("<file>#<start>-<end>") are stable while the file is unchanged and
+  resolve back to the exact text with a single seek
+"""
+import os
+import re
+import numpy as np
+from bot_core.knowledge_index import KNOWLEDGE_DIR
+from bot_core.extract_text import text_path
+
+PASSAGE_EMBEDDINGS_PATH = os.path.join(KNOWLEDGE_DIR, "passage_embeddings.npy")
+PASSAGE_IDS_PATH = os.path.join(KNOWLEDGE_DIR, "passage_ids.txt")
+PASSAGE_NAMESPACE = "passages"  # Pinecone namespace, kept apart from the document vectors
+CHUNK_WORDS = 200
+OVERLAP_WORDS = 50
+
+WORD_RE = re.compile(r"\w+")
+
+def passage_id(filename, start, end):
+    return f"{filename}#{start}-{end}"
+
+def parse_passage_id(pid):
+    filename, _, span = pid.rpartition("#")
+    start, end = span.split("-")
+    return filename, int(start), int(end)
+
+def chunk_text(text, chunk_words=CHUNK_WORDS, overlap_words=OVERLAP_WORDS):
+    """Yield (byte_start, byte_end, passage_text) windows over the words of text."""
+    if overlap_words >= chunk_words:
+        raise ValueError("overlap_words must be smaller than chunk_words")
+    spans = [m.span() for m in WORD_RE.finditer(text)]
+    if not spans:
+        return
+    # Byte offset of each word start/end, accumulated once instead of re-encoding prefixes
+    byte_starts, byte_ends = [], []
+    pos = byte_pos = 0
+    for start, end in spans:
+        byte_pos += len(text[pos:start].encode("utf-8"))
+        byte_starts.append(byte_pos)
+        byte_pos += len(text[start:end].encode("utf-8"))
+        byte_ends.append(byte_pos)
+        pos = end
+    step = chunk_words - overlap_words
+    for first in range(0, len(spans), step):
+        last = min(first + chunk_words, len(spans)) - 1
+        yield byte_starts[first], byte_ends[last], text[spans[first][0]:spans[last][1]]
+        if last == len(spans) - 1:
+            break
+
+def chunk_file(path, chunk_words=CHUNK_WORDS, overlap_words=OVERLAP_WORDS):
+    with open(path, "rb") as f:
+        text = f.read().decode("utf-8")
+    yield from chunk_text(text, chunk_words, overlap_words)
+
+def read_passage(docs_dir, pid):
+    """Text of a passage, read with a seek to its byte range."""
+    filename, start, end = parse_passage_id(pid)
+    path = text_path(docs_dir, filename)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        f.seek(start)
+        return f.read(end - start).decode("utf-8", errors="replace")
+
+def build_passage_index(docs, model, embed, chunk_words=CHUNK_WORDS, overlap_words=OVERLAP_WORDS,
+                        embeddings_path=PASSAGE_EMBEDDINGS_PATH, ids_path=PASSAGE_IDS_PATH):
+    """Chunk every document, embed the passages with embed(model, token_lists) and save them.
+
+    docs maps filename -> plain-text path. Passages with no tokens are skipped.
+    """
+    from gensim.utils import simple_preprocess
+    ids, token_lists = [], []
+    for name, path in docs.items():
+        for start, end, text in chunk_file(path, chunk_words, overlap_words):
+            tokens = simple_preprocess(text)
+            if tokens:
+                ids.append(passage_id(name, start, end))
+                token_lists.append(tokens)
+    embeddings = embed(model, token_lists) if token_lists else np.zeros((0, model.vector_size), dtype=np.float32)
+    np.save(embeddings_path, embeddings)
+    with open(ids_path, "w", encoding="utf-8") as f:
+        for pid in ids:
+            f.write(pid + "\n")
+    print(f"Saved {len(ids)} passage embeddings from {len(docs)} documents to {embeddings_path}")
+    return ids
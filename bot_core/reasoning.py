@@ -1,17 +1,164 @@
 """
 Reasoning and planning module for AGI bot core.
-Implements Reasoner and Planner classes.
+Implements Reasoner and Planner classes, plus AsyncReasoner for concurrent callers.
 """
+import asyncio
+import json
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+def prompt_key(state, goal=None):
+    """Cache key for a (state, goal) pair: key order and surrounding/repeated whitespace don't matter."""
+    def norm(value):
+        if isinstance(value, str):
+            return " ".join(value.split())
+        if isinstance(value, dict):
+            return {str(k): norm(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [norm(v) for v in value]
+        return value
+    return json.dumps([norm(state), norm(goal)], sort_keys=True, default=str)
+
+class TTLCache:
+    """LRU cache whose entries also expire ttl seconds after being stored (ttl=None: never)."""
+    def __init__(self, maxsize=256, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires, value = item
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+    def __len__(self):
+        return len(self._data)
+
+class FakeLLM:
+    """Deterministic stand-in for an LLM backend, for tests and offline runs.
+
+    Replies echo the goal and state after an optional delay; calls counts invocations.
+    """
+    def __init__(self, delay=0.0, reply=None):
+        self.delay = delay
+        self.reply = reply
+        self.calls = 0
+        self._lock = threading.Lock()
+    def generate_reply(self, state, goal=None):
+        with self._lock:
+            self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return self.reply if self.reply is not None else f"Plan for {goal}: act on {state}"
+    async def agenerate_reply(self, state, goal=None):
+        with self._lock:
+            self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self.reply if self.reply is not None else f"Plan for {goal}: act on {state}"
 
 class Reasoner:
-    """Performs inference and decision-making using memory and context."""
-    def __init__(self, llm=None):
+    """Performs inference and decision-making using memory and context.
+
+    Replies are cached per normalized (state, goal); cache_size=0 disables caching.
+    """
+    def __init__(self, llm=None, cache_size=256, ttl=300):
         self.llm = llm
+        self.cache = TTLCache(cache_size, ttl)
     def reason(self, state, goal=None):
-        # Placeholder: Use LLM or rules to generate next action/plan
-        if self.llm:
-            return self.llm.generate_reply(state, goal)
-        return "No reasoning backend configured."
+        if not self.llm:
+            return "No reasoning backend configured."
+        key = prompt_key(state, goal)
+        reply = self.cache.get(key)
+        if reply is None:
+            reply = self.llm.generate_reply(state, goal)
+            self.cache.put(key, reply)
+        return reply
+
+class AsyncReasoner:
+    """Async reasoning backend for many concurrent callers.
+
+    Identical in-flight prompts share one LLM call, replies are cached as in
+    Reasoner, at most max_concurrency calls run at once and each is bounded by
+    timeout seconds (asyncio.TimeoutError). Uses llm.agenerate_reply when the
+    backend has it, otherwise runs generate_reply in a worker thread.
+    A timed-out thread call can't be interrupted, so it keeps its slot until it
+    actually returns; the limit therefore holds for real backend calls.
+    Failures are not cached. Slots and in-flight calls are tracked per event loop.
+    """
+    def __init__(self, llm, cache_size=256, ttl=300, max_concurrency=4, timeout=30.0):
+        self.llm = llm
+        self.cache = TTLCache(cache_size, ttl)
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._loops = weakref.WeakKeyDictionary()  # loop -> (semaphore, {key: task})
+    def _loop_state(self):
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None:
+            state = self._loops[loop] = (asyncio.Semaphore(self.max_concurrency), {})
+        return state
+    async def reason(self, state, goal=None):
+        key = prompt_key(state, goal)
+        reply = self.cache.get(key)
+        if reply is not None:
+            return reply
+        _, inflight = self._loop_state()
+        task = inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._call(key, state, goal))
+            inflight[key] = task
+            task.add_done_callback(lambda _: inflight.pop(key, None))
+        # shield: one caller giving up must not cancel the call for the others
+        return await asyncio.shield(task)
+    async def reason_many(self, requests):
+        """Reason over (state, goal) pairs concurrently; exceptions are returned in place."""
+        return await asyncio.gather(*(self.reason(state, goal) for state, goal in requests),
+                                    return_exceptions=True)
+    async def _call(self, key, state, goal):
+        slots, _ = self._loop_state()
+        await slots.acquire()
+        if hasattr(self.llm, "agenerate_reply"):
+            call = asyncio.ensure_future(self.llm.agenerate_reply(state, goal))
+            cancellable = True
+        else:
+            call = asyncio.get_running_loop().run_in_executor(None, self.llm.generate_reply, state, goal)
+            cancellable = False
+
+        def finished(future):
+            slots.release()
+            if not future.cancelled():
+                future.exception()  # retrieved, so an abandoned failure isn't logged as unhandled
+
+        call.add_done_callback(finished)
+        try:
+            reply = await asyncio.wait_for(asyncio.shield(call), self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            if cancellable:
+                call.cancel()
+            raise
+        self.cache.put(key, reply)
+        return reply
 
 class Planner:
     """Breaks down goals into actionable steps."""
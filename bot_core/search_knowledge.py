@@ -1,60 +1,214 @@
 """
-Semantic search over your knowledge base using Pinecone and your custom Word2Vec model.
-- Embeds a user query
-- Searches Pinecone for the most similar documents
-- Prints the top results with their scores and file content
+Semantic search over your knowledge base using your custom Word2Vec model.
+- KnowledgeSearcher loads the word vectors, filename map and index once and keeps them warm;
+  the exported word_vectors.kv is memory-mapped read-only, so worker processes share it
+- Results list the near-duplicate documents folded into each hit ("aliases", see bot_core.dedup)
+- Queries are tokenized like the indexed documents (simple_preprocess) and their
+  embeddings are LRU-cached
+- Searches the local KnowledgeIndex (or Pinecone with KNOWLEDGE_BACKEND=pinecone)
+- Returns the top results with their scores and a snippet of the file content
+
+CLI:
+    python -m bot_core.search_knowledge "a star heuristic" -k 3
+    python -m bot_core.search_knowledge --passages "a star heuristic"   # passage-level hits
+    python -m bot_core.search_knowledge            # interactive prompt
+    python -m bot_core.search_knowledge --serve --port 5001
+HTTP (with --serve):
+    GET  /search?q=...&k=3
+    POST /search  {"queries": ["...", "..."], "k": 3}
+    GET  /health
 """
-import numpy as np
-from gensim.models import Word2Vec
-from pinecone import Pinecone
-from dotenv import load_dotenv
+import argparse
 import os
 import re
+from functools import lru_cache
+import numpy as np
+from bot_core.knowledge_index import KnowledgeIndex, KNOWLEDGE_DIR
+from bot_core.dedup import load_aliases
+from bot_core.extract_text import text_path
+from bot_core.passages import (PASSAGE_EMBEDDINGS_PATH, PASSAGE_IDS_PATH, PASSAGE_NAMESPACE, parse_passage_id,
+                               read_passage)
 
-# Load your trained Word2Vec model
-model = Word2Vec.load("bot_core/knowledge/custom_word2vec.model")
-
-# Helper to embed a query
-def embed_query(query):
-    tokens = [w for w in query.lower().split() if w in model.wv]
-    if not tokens:
-        return np.zeros(model.vector_size)
-    return np.mean([model.wv[w] for w in tokens], axis=0)
-
-# Pinecone setup
-load_dotenv()
-api_key = os.getenv("VECTOR_DB_API_KEY")
-url = os.getenv("VECTOR_DB_URL")
-m = re.match(r"https://([^.]+)\.svc\.([^.]+)\.pinecone\.io", url)
-if m:
+MODEL_PATH = os.path.join(KNOWLEDGE_DIR, "custom_word2vec.model")
+KEYED_VECTORS_PATH = os.path.join(KNOWLEDGE_DIR, "word_vectors.kv")
+DOCS_DIR = os.path.join(KNOWLEDGE_DIR, "docs")
+SNIPPET_CHARS = 500
+
+def pinecone_index():
+    from dotenv import load_dotenv
+    from pinecone import Pinecone
+    load_dotenv()
+    api_key = os.getenv("VECTOR_DB_API_KEY")
+    url = os.getenv("VECTOR_DB_URL")
+    m = re.match(r"https://([^.]+)\.svc\.([^.]+)\.pinecone\.io", url or "")
+    if not m:
+        raise ValueError("Could not parse Pinecone index name from VECTOR_DB_URL.")
     subdomain = m.group(1)
     parts = subdomain.split('-')
     index_name = '-'.join(parts[:2])
-    pc = Pinecone(api_key=api_key)
-    index = pc.Index(index_name)
-else:
-    raise ValueError("Could not parse Pinecone index name from VECTOR_DB_URL.")
-
-# Load filenames for mapping IDs to files
-with open("bot_core/knowledge/doc_filenames.txt", encoding="utf-8") as f:
-    filenames = [line.strip() for line in f]
-
-# User query
-query = input("Enter your question or search phrase: ")
-query_vec = embed_query(query)
-
-# Search Pinecone
-results = index.query(vector=query_vec.tolist(), top_k=3, include_metadata=False)
-print("\nTop results:")
-for match in results['matches']:
-    doc_id = match['id']
-    score = match['score']
-    print(f"\nFile: {doc_id} (score: {score:.4f})")
-    # Print a snippet of the file content
-    doc_path = os.path.join("bot_core/knowledge/docs", doc_id)
-    if os.path.exists(doc_path):
+    return Pinecone(api_key=api_key).Index(index_name)
+
+class KnowledgeSearcher:
+    """Long-lived semantic search over the knowledge base."""
+    def __init__(self, model_path=MODEL_PATH, docs_dir=DOCS_DIR, index=None, backend=None, mode=None,
+                 passages=False, vectors_path=KEYED_VECTORS_PATH, cache_size=1024, precision=None,
+                 rerank=None):
+        if os.path.exists(vectors_path):
+            from gensim.models import KeyedVectors
+            self.wv = KeyedVectors.load(vectors_path, mmap="r")
+        else:
+            # Falls back to the full model until embed_knowledge has exported word_vectors.kv
+            from gensim.models import Word2Vec
+            self.wv = Word2Vec.load(model_path).wv
+        self._embed_cached = lru_cache(maxsize=cache_size)(self._embed_tokens)
+        self.aliases = load_aliases()
+        self.docs_dir = docs_dir
+        self.passages = passages
+        # Pinecone namespace to query; passages are synced to their own (see inspect_embeddings)
+        self.namespace = PASSAGE_NAMESPACE if passages else ""
+        if index is None:
+            backend = backend or os.getenv("KNOWLEDGE_BACKEND", "local")
+            # KNOWLEDGE_INDEX_MODE=ivf switches to approximate search for large corpora
+            mode = mode or os.getenv("KNOWLEDGE_INDEX_MODE", "exact")
+            # KNOWLEDGE_INDEX_PRECISION=int8 scans ~4x smaller codes; KNOWLEDGE_INDEX_RERANK=4 re-scores
+            # the top 4*k of them in float32 (keeping a float32 copy on disk too)
+            precision = precision or os.getenv("KNOWLEDGE_INDEX_PRECISION", "f32")
+            rerank = int(os.getenv("KNOWLEDGE_INDEX_RERANK", "0")) if rerank is None else rerank
+            if backend == "pinecone":
+                # Passage snippets are still read from docs_dir via the byte offsets in their ids
+                index = pinecone_index()
+            elif passages:
+                index = KnowledgeIndex.load(PASSAGE_EMBEDDINGS_PATH, PASSAGE_IDS_PATH, mode=mode, precision=precision,
+                                            rerank=rerank)
+            else:
+                index = KnowledgeIndex.load(mode=mode, precision=precision, rerank=rerank)
+        self.index = index
+
+    def embed_query(self, query):
+        """Mean word vector of the query (zeros if no word is known); cached, so treat it as read-only."""
+        from gensim.utils import simple_preprocess
+        return self._embed_cached(tuple(simple_preprocess(query)))
+
+    def _embed_tokens(self, tokens):
+        key_to_index = self.wv.key_to_index
+        rows = [key_to_index[w] for w in tokens if w in key_to_index]
+        if not rows:
+            vector = np.zeros(self.wv.vector_size, dtype=np.float32)
+        else:
+            vector = np.asarray(self.wv.vectors[rows].mean(axis=0), dtype=np.float32)
+        vector.flags.writeable = False
+        return vector
+
+    def snippet(self, doc_id):
+        if self.passages:
+            return read_passage(self.docs_dir, doc_id)
+        # PDFs, Markdown and code are read from their extracted text
+        doc_path = text_path(self.docs_dir, doc_id)
+        if not os.path.exists(doc_path):
+            return None
         with open(doc_path, encoding="utf-8") as f:
-            content = f.read(500)
-            print(content.strip() + ("..." if len(content) == 500 else ""))
+            content = f.read(SNIPPET_CHARS)
+        return content.strip() + ("..." if len(content) == SNIPPET_CHARS else "")
+
+    def _results(self, matches, with_snippets):
+        results = []
+        for doc_id, score in matches:
+            file = parse_passage_id(doc_id)[0] if self.passages else doc_id
+            results.append({"id": doc_id, "file": file, "score": score, "aliases": self.aliases.get(file, []),
+                            "snippet": self.snippet(doc_id) if with_snippets else None})
+        return results
+
+    def search(self, query, k=3, with_snippets=True):
+        """Top-k documents (or passages) for one query: [{"id", "file", "score", "aliases", "snippet"}]."""
+        return self.search_batch([query], k, with_snippets)[0]
+
+    def search_batch(self, queries, k=3, with_snippets=True):
+        """Top-k documents for each query, embedded and scored together where the index allows."""
+        if not queries:
+            return []
+        vectors = np.stack([self.embed_query(q) for q in queries])
+        if isinstance(self.index, KnowledgeIndex):
+            batches = self.index.search_batch(vectors, k)
+        else:
+            batches = [[(m["id"], m["score"])
+                        for m in self.index.query(vector=v.tolist(), top_k=k, namespace=self.namespace)["matches"]]
+                       for v in vectors]
+        return [self._results(matches, with_snippets) for matches in batches]
+
+def create_app(searcher):
+    """Flask app exposing the searcher so callers can keep it warm between requests."""
+    from flask import Flask, jsonify, request
+    app = Flask(__name__)
+
+    @app.get("/health")
+    def health():
+        return jsonify({"status": "ok", "documents": len(searcher.index) if hasattr(searcher.index, "__len__") else None})
+
+    def parse_k(value):
+        # Positive int, or a numeric string from the query string; None if invalid
+        if isinstance(value, str) and value.strip().isdigit():
+            value = int(value)
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            return None
+        return value
+
+    @app.route("/search", methods=["GET", "POST"])
+    def search():
+        if request.method == "GET":
+            query = request.args.get("q", "")
+            if not query:
+                return jsonify({"error": "Missing query parameter 'q'."}), 400
+            k = parse_k(request.args.get("k", 3))
+            if k is None:
+                return jsonify({"error": "Query parameter 'k' must be a positive integer."}), 400
+            return jsonify({"results": searcher.search(query, k)})
+        body = request.get_json(silent=True) or {}
+        queries = body.get("queries")
+        k = parse_k(body.get("k", 3))
+        if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries) or k is None:
+            return jsonify({"error": "Expected JSON body {\"queries\": [str, ...], \"k\": int >= 1}."}), 400
+        return jsonify({"results": searcher.search_batch(queries, k)})
+
+    return app
+
+def print_results(results):
+    print("\nTop results:")
+    for result in results:
+        location = f" [{result['id'].rpartition('#')[2]}]" if result["id"] != result["file"] else ""
+        print(f"\nFile: {result['file']}{location} (score: {result['score']:.4f})")
+        if result["aliases"]:
+            print(f"Also as: {', '.join(result['aliases'])}")
+        print(result["snippet"] if result["snippet"] is not None else "[File not found]")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Semantic search over the knowledge base.")
+    parser.add_argument("query", nargs="*", help="Search phrase (prompts interactively if omitted)")
+    parser.add_argument("-k", type=int, default=3, help="Number of results")
+    parser.add_argument("--backend", choices=["local", "pinecone"], default=None)
+    parser.add_argument("--mode", choices=["exact", "ivf"], default=None, help="Local index mode")
+    parser.add_argument("--precision", choices=["f32", "int8"], default=None, help="Local index storage")
+    parser.add_argument("--rerank", type=int, default=None,
+                        help="Re-score the top rerank*k int8 candidates in float32 (0: off)")
+    parser.add_argument("--passages", action="store_true", help="Search the passage-level index")
+    parser.add_argument("--serve", action="store_true", help="Serve /search over HTTP instead")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5001)
+    args = parser.parse_args(argv)
+
+    searcher = KnowledgeSearcher(backend=args.backend, mode=args.mode, passages=args.passages,
+                                 precision=args.precision, rerank=args.rerank)
+    if args.serve:
+        create_app(searcher).run(host=args.host, port=args.port)
+    elif args.query:
+        print_results(searcher.search(" ".join(args.query), args.k))
     else:
-        print("[File not found]")
+        try:
+            while True:
+                query = input("Enter your question or search phrase (Ctrl+C to quit): ").strip()
+                if query:
+                    print_results(searcher.search(query, args.k))
+        except (KeyboardInterrupt, EOFError):
+            print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Import-time regression check for the bot_core and RL packages.
+
+Imports each module in a fresh interpreter with -X importtime and fails if it
+pulls in a heavy dependency (torch, gensim, pinecone, ...) or exceeds its time
+budget. Run it after touching module-level imports:
+
+    python check_import_time.py
+    python check_import_time.py --budget-scale 2   # slower machines / CI
+"""
+import argparse
+import re
+import subprocess
+import sys
+
+HEAVY = ("torch", "gensim", "pinecone", "scipy", "flask", "pygame", "matplotlib", "trafilatura",
+         "wikipediaapi", "pypdf", "requests")
+
+# module -> budget in ms (numpy alone costs ~100 ms)
+MODULES = {
+    "bot_core": 50,
+    "bot_core.memory": 50,
+    "bot_core.goals": 50,
+    "bot_core.reasoning": 150,
+    "bot_core.knowledge_index": 300,
+    "bot_core.search_knowledge": 400,
+    "bot_core.embed_knowledge": 300,
+    "bot_core.inspect_embeddings": 300,
+    "bot_core.dedup": 300,
+    "RL": 50,
+    "RL.env": 300,
+    "RL.agent": 300,
+    "RL.checkpoint": 50,
+    "RL.train": 300,
+}
+
+_LINE_RE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \|\s+(.*)$")
+
+def measure(module):
+    """(total import time in ms, heavy modules loaded) for importing module in a fresh interpreter."""
+    code = f"import sys, {module}; print(','.join(sorted({{m.split('.')[0] for m in sys.modules}})))"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+    total = 0
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m and m.group(2).strip() == module:
+            total = int(m.group(1)) / 1000
+    loaded = set(proc.stdout.strip().split(","))
+    return total, sorted(loaded.intersection(HEAVY))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that package imports stay lightweight.")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="Multiply every time budget by this")
+    parser.add_argument("modules", nargs="*", help="Only check these modules")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for module in args.modules or MODULES:
+        budget = MODULES.get(module, 300) * args.budget_scale
+        try:
+            total, heavy = measure(module)
+        except RuntimeError as e:
+            print(f"[!] {e}")
+            failures += 1
+            continue
+        problems = []
+        if heavy:
+            problems.append(f"loads {', '.join(heavy)}")
+        if total > budget:
+            problems.append(f"over budget ({budget:.0f} ms)")
+        print(f"[{'!' if problems else '+'}] {module:<30}{total:8.1f} ms  {'; '.join(problems)}")
+        failures += bool(problems)
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()